@@ -0,0 +1,79 @@
+# bench_boss.py
+"""
+boss_chat inference throughput: Pipeline.predict per message vs
+boss_chat.MoodPredictor (LRU of vectorized messages, batched predict_many).
+
+    python bench_boss.py
+    python bench_boss.py --messages 20000 --fresh 0.2 --batch 64 256
+
+Messages are drawn from boss_dataset.csv with random case/spacing changes;
+a --fresh share gets a unique suffix so it can never hit the cache.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from boss_chat import MODEL_PATH, MoodPredictor
+
+DATASET = "boss_dataset.csv"
+
+
+def make_messages(n: int, fresh: float, seed: int):
+    texts = pd.read_csv(DATASET)["text"].astype(str).tolist()
+    rng = np.random.default_rng(seed)
+    msgs = []
+    for i in range(n):
+        m = texts[rng.integers(len(texts))]
+        if rng.random() < 0.3:
+            m = m.upper()
+        if rng.random() < 0.3:
+            m = "  " + m.replace(" ", "   ")
+        if rng.random() < fresh:
+            m = f"{m} ticket {i}"
+        msgs.append(m)
+    return msgs
+
+
+def rate(fn, n: int):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, n / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Messages/second of boss_chat inference paths.")
+    ap.add_argument("--messages", type=int, default=5000)
+    ap.add_argument("--fresh", type=float, default=0.1, help="share of never-seen messages")
+    ap.add_argument("--batch", type=int, nargs="+", default=[32, 256])
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    model = load(MODEL_PATH)
+    msgs = make_messages(args.messages, args.fresh, args.seed)
+    n = len(msgs)
+
+    reference, r = rate(lambda: [int(model.predict([m])[0]) for m in msgs], n)
+    rows = [("pipeline.predict x1", r, 1.0)]
+    _, r = rate(lambda: model.predict(msgs), n)
+    rows.append(("pipeline.predict all", r, 1.0))
+
+    predictor = MoodPredictor(model)
+    preds, r = rate(lambda: [predictor.predict(m) for m in msgs], n)
+    rows.append(("predictor x1", r, np.mean(np.array(preds) == reference)))
+    print(f"[BENCH] cache hit rate over {n} single calls: {predictor.hits / n:.2f}")
+
+    for b in args.batch:
+        predictor = MoodPredictor(model)
+        preds, r = rate(lambda: [p for s in range(0, n, b) for p in predictor.predict_many(msgs[s:s + b])], n)
+        rows.append((f"predictor batch{b}", r, np.mean(np.array(preds) == reference)))
+
+    print(f"{'path':>22} {'msgs/s':>10} {'agree':>6}")
+    for name, r, agree in rows:
+        print(f"{name:>22} {r:>10.0f} {agree:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
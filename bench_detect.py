@@ -0,0 +1,88 @@
+# bench_detect.py
+"""
+Haar detection modes on a recorded clip (or image directory): latency and
+recall of the largest face against the current full-resolution settings.
+
+    python bench_detect.py gate.mp4
+    python bench_detect.py faces_db --pad 80 --scale 0.5
+
+Modes: full (utils.detect_largest_face, the reference), scaled (downscaled
+frame), roi and roi+scaled (utils.FaceDetector: ROI around the last face,
+periodic full scan). Recall = share of reference hits where the mode's box
+overlaps the reference box with IoU >= --iou.
+"""
+import argparse
+import time
+
+import cv2
+
+from bench_faces import percentiles
+from config import FULL_SCAN_EVERY, ROI_MARGIN
+from sources import open_source
+from tracking import iou
+from utils import load_face_detector, detect_largest_face, detect_faces, largest, FaceDetector
+
+
+def read_frames(source, pad: int, limit):
+    src = open_source(source)
+    frames = []
+    while limit is None or len(frames) < limit:
+        ok, frame = src.read()
+        if not ok:
+            if src.live:
+                continue
+            break
+        if pad:
+            frame = cv2.copyMakeBorder(frame, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=(128, 128, 128))
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    src.release()
+    return frames
+
+
+def run_mode(detect, frames):
+    boxes, ms = [], []
+    for gray in frames:
+        t0 = time.perf_counter()
+        boxes.append(detect(gray))
+        ms.append((time.perf_counter() - t0) * 1000.0)
+    return boxes, ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Haar largest-face detection: latency and recall per mode.")
+    ap.add_argument("source", help="video file, image directory or camera index")
+    ap.add_argument("--limit", type=int, default=None, help="frames to read")
+    ap.add_argument("--pad", type=int, default=0, help="gray border (px) around each frame")
+    ap.add_argument("--scale", type=float, default=0.5, help="downscale factor for the scaled modes")
+    ap.add_argument("--roi-margin", type=float, default=ROI_MARGIN)
+    ap.add_argument("--full-every", type=int, default=FULL_SCAN_EVERY)
+    ap.add_argument("--iou", type=float, default=0.5)
+    args = ap.parse_args()
+
+    frames = read_frames(args.source, args.pad, args.limit)
+    det = load_face_detector()
+    roi = FaceDetector(det, scale=1.0, roi_margin=args.roi_margin, full_every=args.full_every)
+    roi_scaled = FaceDetector(det, scale=args.scale, roi_margin=args.roi_margin, full_every=args.full_every)
+    modes = [
+        ("full", lambda g: detect_largest_face(det, g)),
+        (f"scaled{args.scale:g}", lambda g: largest(detect_faces(det, g, scale=args.scale))),
+        ("roi", roi.detect),
+        (f"roi+scaled{args.scale:g}", roi_scaled.detect),
+    ]
+
+    reference = None
+    print(f"[BENCH] {len(frames)} frames from {args.source}")
+    print(f"{'mode':>16} {'mean_ms':>8} {'latency':>36} {'found':>6} {'recall':>7}")
+    for name, detect in modes:
+        boxes, ms = run_mode(detect, frames)
+        if reference is None:
+            reference = boxes
+        hits = [(r, b) for r, b in zip(reference, boxes) if r is not None]
+        recall = sum(b is not None and iou(tuple(r), tuple(b)) >= args.iou for r, b in hits) / max(1, len(hits))
+        found = sum(b is not None for b in boxes)
+        print(f"{name:>16} {sum(ms) / max(1, len(ms)):>8.2f} {percentiles(ms):>36} {found:>6} {recall:>7.3f}")
+    print(f"[BENCH] full scans: roi={roi.full_scans} roi+scaled={roi_scaled.full_scans}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# bench_faces.py
+"""
+Offline face-recognition benchmark: replays a video file or an image
+directory through the realtime detect/track/recognize stages, headless.
+
+    python bench_faces.py faces_db --pad 80
+    python bench_faces.py gate.mp4 --label ovidiu --detect-every 3 --detect-scale 0.5
+
+Reports frames/second, detection and recognition latency percentiles and,
+when frames carry a label (faces_db/<person>/... or --label), accuracy.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from config import DETECT_EVERY, DETECT_SCALE, RECOG_REFRESH
+from realtime import load_recognizer, track_faces, refresh_identities
+from sources import open_source
+from tracking import FaceTracker
+from utils import load_face_detector
+
+
+def percentiles(ms) -> str:
+    if not ms:
+        return "n/a"
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return f"p50={p50:.2f} p95={p95:.2f} p99={p99:.2f} ms"
+
+
+def run_bench(args):
+    model, label_to_name = load_recognizer()
+    det = load_face_detector()
+    src = open_source(args.source, label=args.label)
+
+    tracker = FaceTracker()
+    detect_ms, recog_ms = [], []
+    frames = predictions = scored = correct = no_face = 0
+
+    t_start = time.perf_counter()
+    while args.limit is None or frames < args.limit:
+        ok, frame = src.read()
+        if not ok:
+            if src.live:
+                continue
+            break
+        if args.pad:
+            frame = cv2.copyMakeBorder(frame, args.pad, args.pad, args.pad, args.pad,
+                                       cv2.BORDER_CONSTANT, value=(128, 128, 128))
+
+        # still images are unrelated to each other: detect and recognize every one afresh
+        idx = 0 if src.stills else frames
+        if src.stills:
+            tracker.reset()
+
+        t0 = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        tracks = track_faces(det, tracker, gray, idx, detect_every=args.detect_every, scale=args.detect_scale)
+        t1 = time.perf_counter()
+        before = [t.recognized_at for t in tracks]
+        refresh_identities(model, label_to_name, tracks, gray, idx, refresh=args.refresh, verbose=False)
+        t2 = time.perf_counter()
+
+        detect_ms.append((t1 - t0) * 1000.0)
+        n_pred = sum(t.recognized_at != b for t, b in zip(tracks, before))
+        if n_pred:
+            predictions += n_pred
+            recog_ms.append((t2 - t1) * 1000.0)
+
+        if src.label is not None:
+            scored += 1
+            if not tracks:
+                no_face += 1
+            elif any(t.name == src.label for t in tracks):
+                correct += 1
+        frames += 1
+    elapsed = time.perf_counter() - t_start
+    src.release()
+
+    print(f"[BENCH] source={args.source} detect_every={args.detect_every} scale={args.detect_scale} "
+          f"refresh={args.refresh} pad={args.pad}")
+    print(f"[BENCH] frames={frames} in {elapsed:.2f}s -> {frames / max(elapsed, 1e-9):.1f} FPS")
+    print(f"[BENCH] detect/track per frame: {percentiles(detect_ms)}")
+    print(f"[BENCH] recognize per frame with predictions ({predictions} predicts): {percentiles(recog_ms)}")
+    if scored:
+        print(f"[BENCH] accuracy={correct / scored:.3f} ({correct}/{scored}) | no face found: {no_face}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless face detection/recognition benchmark.")
+    ap.add_argument("source", help="video file, image directory (e.g. faces_db) or camera index")
+    ap.add_argument("--label", default=None, help="true identity of every frame (video sources)")
+    ap.add_argument("--limit", type=int, default=None, help="stop after this many frames")
+    ap.add_argument("--pad", type=int, default=0,
+                    help="gray border (px) around each frame; tight face crops need it to be detected")
+    ap.add_argument("--detect-every", type=int, default=DETECT_EVERY)
+    ap.add_argument("--detect-scale", type=float, default=DETECT_SCALE)
+    ap.add_argument("--refresh", type=int, default=RECOG_REFRESH, help="frames before re-recognizing a track")
+    run_bench(ap.parse_args())
+
+
+if __name__ == "__main__":
+    main()
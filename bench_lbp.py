@@ -0,0 +1,105 @@
+# bench_lbp.py
+"""
+NumPy LBP index (lbp.LBPIndex) vs cv2 LBPHFaceRecognizer.predict on
+synthetic galleries built from faces_db.
+
+    python bench_lbp.py
+    python bench_lbp.py --identities 100 1000 --samples 2 --queries 50 --prune 20
+
+Every identity is one faces_db crop under its own fixed warp (rotation,
+scale, shift, gamma); samples and queries add small random jitter on top.
+Reports per-query latency of both recognizers, how often the index agrees
+with OpenCV's label and the max confidence difference, and accuracy.
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from config import DB_DIR, FACE_SIZE
+from lbp import LBPIndex
+
+
+def load_base_faces():
+    paths = sorted(glob.glob(os.path.join(DB_DIR, "*", "*.png")))
+    faces = [cv2.imread(p, cv2.IMREAD_GRAYSCALE) for p in paths]
+    faces = [cv2.resize(f, FACE_SIZE, interpolation=cv2.INTER_AREA) for f in faces if f is not None]
+    if not faces:
+        raise RuntimeError(f"No faces in {DB_DIR}. Enroll someone first.")
+    return faces
+
+
+def warp(face, angle, scale, shift, gamma):
+    w, h = FACE_SIZE
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, scale)
+    M[:, 2] += shift
+    out = cv2.warpAffine(face, M, (w, h), borderMode=cv2.BORDER_REFLECT)
+    lut = (255.0 * (np.arange(256) / 255.0) ** gamma).astype(np.uint8)
+    return cv2.LUT(out, lut)
+
+
+def synthetic_gallery(base, identities: int, samples: int, queries: int, seed: int):
+    rng = np.random.default_rng(seed)
+    ids = [(base[i % len(base)], rng.uniform(-12, 12), rng.uniform(0.9, 1.1),
+            rng.uniform(-6, 6, size=2), rng.uniform(0.7, 1.4)) for i in range(identities)]
+
+    def sample(i):
+        face, angle, scale, shift, gamma = ids[i]
+        return warp(face, angle + rng.uniform(-2, 2), scale, shift + rng.uniform(-2, 2, size=2), gamma)
+
+    X = np.stack([sample(i) for i in range(identities) for _ in range(samples)])
+    y = np.repeat(np.arange(identities, dtype=np.int32), samples)
+    q_labels = rng.integers(0, identities, size=queries).astype(np.int32)
+    Q = np.stack([sample(int(i)) for i in q_labels])
+    return X, y, Q, q_labels
+
+
+def timed_predictions(predict, Q):
+    t0 = time.perf_counter()
+    preds = [predict(q) for q in Q]
+    ms = (time.perf_counter() - t0) * 1000.0 / len(Q)
+    return np.array([p[0] for p in preds]), np.array([p[1] for p in preds]), ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description="NumPy LBP index vs OpenCV LBPH predict.")
+    ap.add_argument("--identities", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--samples", type=int, default=1, help="gallery samples per identity")
+    ap.add_argument("--queries", type=int, default=30)
+    ap.add_argument("--prune", type=int, default=10, help="people kept by centroid pruning")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    base = load_base_faces()
+    print(f"{'ids':>6} {'gallery':>8} {'recognizer':>12} {'ms/query':>9} {'agree':>6} {'max|dconf|':>10} {'acc':>6}")
+    for n_ids in args.identities:
+        X, y, Q, q_labels = synthetic_gallery(base, n_ids, args.samples, args.queries, args.seed)
+
+        model = cv2.face.LBPHFaceRecognizer_create(radius=1, neighbors=8, grid_x=8, grid_y=8)
+        model.train(list(X), y)
+        cv_labels, cv_conf, cv_ms = timed_predictions(model.predict, Q)
+        del model
+
+        t0 = time.perf_counter()
+        index = LBPIndex.from_faces(X, y)
+        build_s = time.perf_counter() - t0
+        del X
+
+        rows = [("opencv", cv_labels, cv_conf, cv_ms)]
+        rows.append(("lbp-exact",) + timed_predictions(index.predict, Q))
+        index.prune = args.prune
+        rows.append((f"lbp-prune{args.prune}",) + timed_predictions(index.predict, Q))
+
+        for name, labels, conf, ms in rows:
+            agree = np.mean(labels == cv_labels)
+            dconf = np.max(np.abs(conf - cv_conf))
+            acc = np.mean(labels == q_labels)
+            print(f"{n_ids:>6} {len(y):>8} {name:>12} {ms:>9.2f} {agree:>6.2f} {dconf:>10.4f} {acc:>6.2f}")
+        print(f"{'':>6} index build from faces: {build_s:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
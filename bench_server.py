@@ -0,0 +1,118 @@
+# bench_server.py
+"""
+Load generator for face_server.py: N simulated cameras, each on its own
+connection, sending faces_db crops (or padded frames) at a fixed rate.
+
+    python face_server.py &
+    python bench_server.py --cameras 8 --fps 15 --seconds 10
+    python bench_server.py --cameras 4 --frames --spawn
+
+Reports requests and faces per second, per-request latency percentiles
+and accuracy against the faces_db folder names.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from bench_faces import percentiles
+from config import DB_DIR, SERVER_HOST, SERVER_PORT
+from face_server import FaceClient
+from recognition import load_crops
+
+
+def camera(args, cam: int, crops, truth, out):
+    client = FaceClient(args.host, args.port, args.unix)
+    rng = np.random.default_rng(cam)
+    period = 1.0 / args.fps if args.fps > 0 else 0.0
+    ms, faces, correct, scored = [], 0, 0, 0
+    next_at = time.perf_counter()
+    stop_at = next_at + args.seconds
+    while time.perf_counter() < stop_at:
+        pick = rng.integers(0, len(crops), size=args.faces)
+        t0 = time.perf_counter()
+        if args.frames:
+            gray = cv2.copyMakeBorder(crops[pick[0]], 80, 80, 80, 80, cv2.BORDER_CONSTANT, value=128)
+            results = client.recognize_frame(gray)
+            pick = pick[:1]
+        else:
+            results = client.recognize_crops(crops[pick])
+        ms.append((time.perf_counter() - t0) * 1000.0)
+        faces += len(results)
+        scored += len(pick)
+        correct += sum(r["name"] == truth[i] for r, i in zip(results, pick))
+        if period:
+            next_at += period
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+    client.close()
+    out[cam] = (ms, faces, correct, scored)
+
+
+def spawn_server(args):
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "face_server.py"),
+           "--port", str(args.port), "--window-ms", str(args.window_ms)]
+    if args.unix:
+        cmd += ["--unix", args.unix]
+    proc = subprocess.Popen(cmd)
+    for _ in range(200):
+        try:
+            FaceClient(args.host, args.port, args.unix).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("face_server.py did not start listening.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulate camera clients against face_server.py.")
+    ap.add_argument("--cameras", type=int, default=4)
+    ap.add_argument("--fps", type=float, default=15.0, help="requests per second per camera (0 = as fast as possible)")
+    ap.add_argument("--faces", type=int, default=1, help="crops per request")
+    ap.add_argument("--frames", action="store_true", help="send whole frames (server-side detection)")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--host", default=SERVER_HOST)
+    ap.add_argument("--port", type=int, default=SERVER_PORT)
+    ap.add_argument("--unix", default=None)
+    ap.add_argument("--spawn", action="store_true", help="start face_server.py for the run")
+    ap.add_argument("--window-ms", type=float, default=5.0, help="batch window for --spawn")
+    args = ap.parse_args()
+
+    paths, crops = load_crops(DB_DIR)
+    if not len(crops):
+        raise RuntimeError(f"No faces in {DB_DIR}. Enroll someone first.")
+    truth = [os.path.basename(os.path.dirname(p)) for p in paths]
+
+    proc = spawn_server(args) if args.spawn else None
+    try:
+        out = {}
+        threads = [threading.Thread(target=camera, args=(args, c, crops, truth, out)) for c in range(args.cameras)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    ms = [m for r in out.values() for m in r[0]]
+    faces = sum(r[1] for r in out.values())
+    correct = sum(r[2] for r in out.values())
+    scored = sum(r[3] for r in out.values())
+    mode = "frames" if args.frames else f"{args.faces} crop(s)"
+    print(f"[BENCH] {args.cameras} cameras x {args.fps:g} fps, {mode} per request, {elapsed:.1f}s")
+    print(f"[BENCH] {len(ms) / elapsed:.1f} requests/s, {faces / elapsed:.1f} faces/s")
+    print(f"[BENCH] latency per request: {percentiles(ms)}")
+    print(f"[BENCH] accuracy={correct / max(1, scored):.3f} ({correct}/{scored})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench_startup.py
+"""
+Startup-time benchmark for the entry points, based on `python -X importtime`.
+
+    python bench_startup.py
+    python bench_startup.py main task3 --repeat 10 --top 8
+
+Each entry point is imported in a fresh interpreter (its __main__ block does
+not run). Reported: median cumulative import time of the module itself, median
+wall time of the whole interpreter, and the heaviest top-level imports it pulled in.
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = ["main", "runtask2", "task3", "boss_chat", "realtime"]
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, int], float]:
+    """
+    One cold import of `module`: its cumulative import time and that of each
+    of its direct imports (microseconds), plus the interpreter's wall time.
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    # lines are "import time: self | cumulative | <2*depth spaces>name", children before parent
+    own, children, pending = 0, {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            pending[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name.strip() == module:
+                own, children = int(cumulative), pending
+            pending = {}
+    return own, children, wall
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold-start import time of each entry point.")
+    ap.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top", type=int, default=5, help="heaviest imports to list per entry point")
+    args = ap.parse_args()
+
+    print(f"{'entry point':>12} {'import_ms':>10} {'wall_ms':>9}  heaviest direct imports (ms)")
+    for module in args.modules:
+        owns: List[int] = []
+        runs: List[Dict[str, int]] = []
+        walls: List[float] = []
+        for _ in range(args.repeat):
+            own, children, wall = import_times(module)
+            owns.append(own)
+            runs.append(children)
+            walls.append(wall)
+
+        own = statistics.median(owns)
+        median = {name: statistics.median(r.get(name, 0) for r in runs) for name in runs[0]}
+        heavy = sorted(median.items(), key=lambda kv: -kv[1])[:args.top]
+        heavy_s = ", ".join(f"{name} {us / 1000:.1f}" for name, us in heavy)
+        print(f"{module:>12} {own / 1000:>10.1f} {statistics.median(walls) * 1000:>9.1f}  {heavy_s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# bench_task3.py
+"""
+Benchmarks for the task3 map-coloring solvers.
+
+    python bench_task3.py engines --sizes 1000 5000 --degree 3.5
+    python bench_task3.py propagation --nodes 60 --seeds 10
+    python bench_task3.py search --nodes 70
+    python bench_task3.py stack --sizes 500 2000 100000 300000
+    python bench_task3.py generate --sizes 2000 1000000
+    python bench_task3.py local --sizes 1000 100000 --degree 7
+"""
+from __future__ import annotations
+import argparse
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Set
+
+from task3 import (solve_map_coloring, solve_map_coloring_bitset, solve_map_coloring_local,
+                   generate_random_graph, generate_random_graph_csr,
+                   is_valid_coloring, count_edges, pop_stats,
+                   select_unassigned_var, order_values_lcv, forward_check)
+
+# the set-copying solvers are O(n^2) in time and memory, keep them to sizes that finish
+SETS_MAX_NODES = 3000
+
+
+def sparse_random_graph(n: int, avg_degree: float, seed: int) -> Dict[int, Set[int]]:
+    """G(n, avg_degree/(n-1)) from the NumPy generator, as a dict for all solvers."""
+    return generate_random_graph_csr(n, avg_degree / max(1, n - 1), seed).to_dict()
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    res = fn(*args, **kwargs)
+    return res, time.perf_counter() - t0
+
+
+def bench_engines(args):
+    """Set-based vs bitset solver on sparse graphs of growing size."""
+    colors = [f"C{i+1}" for i in range(args.colors)]
+
+    print(f"{'nodes':>8} {'edges':>8} {'solver':>8} {'time_s':>9} {'calls':>8} {'fails':>7}  ok")
+    for n in args.sizes:
+        adj = sparse_random_graph(n, args.degree, args.seed)
+        results = {}
+        for name, fn in (("sets", solve_map_coloring), ("bitset", solve_map_coloring_bitset)):
+            if name == "sets" and n > SETS_MAX_NODES:
+                print(f"{n:>8} {count_edges(adj):>8} {name:>8} {'skipped':>9}")
+                continue
+            sol, dt = timed(fn, adj, colors, seed=args.seed)
+            if sol is None:
+                print(f"{n:>8} {count_edges(adj):>8} {name:>8} {dt:>9.3f}  no solution")
+                continue
+            stats = pop_stats(sol)
+            results[name] = sol
+            print(f"{n:>8} {count_edges(adj):>8} {name:>8} {dt:>9.3f} {stats['calls']:>8} {stats['fails']:>7}  "
+                  f"{is_valid_coloring(adj, sol)}")
+        if len(results) == 2:
+            print(f"{'':>8} same assignment: {results['sets'] == results['bitset']}")
+
+
+def bench_propagation(args):
+    """
+    Forward checking vs MAC on generate_random_graph instances whose average
+    degree sweeps across the k-colorability threshold (~8.4 for k=4).
+    Counters are summed over solved instances (None carries no stats),
+    time over all of them.
+    """
+    colors = [f"C{i+1}" for i in range(args.colors)]
+    n = args.nodes
+
+    print(f"{'avg_deg':>7} {'p':>6} {'mode':>4} {'solved':>6} {'calls':>9} {'fails':>9} "
+          f"{'revisions':>10} {'prunes':>8} {'time_s':>8}")
+    for deg in args.degrees:
+        p = deg / (n - 1)
+        graphs = [generate_random_graph(n, p, seed=args.seed + s) for s in range(args.seeds)]
+        for mode in ("fc", "mac"):
+            totals = {"calls": 0, "fails": 0, "revisions": 0, "prunes": 0}
+            solved, elapsed = 0, 0.0
+            for adj in graphs:
+                sol, dt = timed(solve_map_coloring_bitset, adj, colors, propagation=mode)
+                elapsed += dt
+                if sol is None:
+                    continue
+                solved += 1
+                for key, value in pop_stats(sol).items():
+                    totals[key] += value
+            print(f"{deg:>7.1f} {p:>6.3f} {mode:>4} {solved:>6} {totals['calls']:>9} {totals['fails']:>9} "
+                  f"{totals['revisions']:>10} {totals['prunes']:>8} {elapsed:>8.3f}")
+
+
+SEARCH_CONFIGS = {
+    "chrono": {},
+    "cbj": {"backjumping": True},
+    "cbj+nogoods": {"backjumping": True, "nogoods": 1000},
+    "restarts": {"restarts": 10},
+    "cbj+ng+restarts": {"backjumping": True, "nogoods": 1000, "restarts": 10},
+}
+
+
+def bench_search(args):
+    """Chronological backtracking vs backjumping / nogoods / restarts near the threshold."""
+    colors = [f"C{i+1}" for i in range(args.colors)]
+    n = args.nodes
+
+    print(f"{'avg_deg':>7} {'config':>16} {'solved':>6} {'calls':>8} {'backjumps':>9} "
+          f"{'nogoods':>7} {'restarts':>8} {'time_s':>8}")
+    for deg in args.degrees:
+        graphs = [generate_random_graph(n, deg / (n - 1), seed=args.seed + s) for s in range(args.seeds)]
+        for name, kwargs in SEARCH_CONFIGS.items():
+            totals = {"calls": 0, "backjumps": 0, "nogoods": 0, "restarts": 0}
+            solved, elapsed = 0, 0.0
+            for i, adj in enumerate(graphs):
+                sol, dt = timed(solve_map_coloring_bitset, adj, colors, seed=args.seed + i, **kwargs)
+                elapsed += dt
+                if sol is None:
+                    continue
+                solved += 1
+                stats = pop_stats(sol)
+                for key in totals:
+                    totals[key] += stats[key]
+            print(f"{deg:>7.1f} {name:>16} {solved:>6} {totals['calls']:>8} {totals['backjumps']:>9} "
+                  f"{totals['nogoods']:>7} {totals['restarts']:>8} {elapsed:>8.3f}")
+
+
+def recursive_solve_map_coloring(adj: Dict[int, Set[int]], colors: List[str]) -> Optional[Dict[int, str]]:
+    """
+    The original recursive solve_map_coloring (forward checking only), kept as
+    the baseline for the explicit-stack solvers.
+    """
+    assignment: Dict[int, str] = {}
+    stats = {"calls": 0, "fails": 0}
+
+    def backtrack(domains):
+        stats["calls"] += 1
+        if len(assignment) == len(adj):
+            return dict(assignment)
+        var = select_unassigned_var(adj, domains, assignment)
+        for color in order_values_lcv(adj, var, domains, assignment):
+            if any(assignment.get(nb) == color for nb in adj[var]):
+                continue
+            ok, new_domains = forward_check(adj, var, color, domains, assignment)
+            if not ok:
+                continue
+            assignment[var] = color
+            res = backtrack(new_domains)
+            if res is not None:
+                return res
+            del assignment[var]
+        stats["fails"] += 1
+        return None
+
+    sol = backtrack({v: set(colors) for v in adj})
+    if sol is not None:
+        sol["_stats_calls"] = stats["calls"]
+        sol["_stats_fails"] = stats["fails"]
+    return sol
+
+
+def measure(fn, *args, **kwargs):
+    """(result, seconds, peak MiB); time from an untraced run, peak from a tracemalloc run."""
+    res, dt = timed(fn, *args, **kwargs)
+    tracemalloc.start()
+    fn(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return res, dt, peak
+
+
+def bench_stack(args):
+    """
+    Recursive baseline vs the explicit-stack solvers, at the default recursion
+    limit: time, peak traced memory and whether the assignment matches.
+    """
+    colors = [f"C{i+1}" for i in range(args.colors)]
+    solvers = (("recursive", recursive_solve_map_coloring),
+               ("sets", solve_map_coloring),
+               ("bitset", solve_map_coloring_bitset))
+
+    print(f"{'nodes':>8} {'solver':>10} {'time_s':>9} {'peak_MiB':>9}  result")
+    for n in args.sizes:
+        adj = sparse_random_graph(n, args.degree, args.seed)
+        reference = None
+        for name, fn in solvers:
+            if name != "bitset" and n > SETS_MAX_NODES:
+                print(f"{n:>8} {name:>10} {'skipped':>9}")
+                continue
+            try:
+                sol, dt, peak = measure(fn, adj, colors)
+            except RecursionError:
+                print(f"{n:>8} {name:>10} {'-':>9} {'-':>9}  RecursionError")
+                continue
+            if sol is not None:
+                pop_stats(sol)
+            if reference is None:
+                reference, same = sol, "reference"
+            else:
+                same = "same" if sol == reference else "DIFFERENT"
+            print(f"{n:>8} {name:>10} {dt:>9.3f} {peak:>9.1f}  {same}")
+
+
+# the pair loop in generate_random_graph is O(n^2) Python calls
+DICT_GEN_MAX_NODES = 5000
+
+
+def bench_generate(args):
+    """Pair-loop generator vs NumPy CSR generator (+ validation/edge count on CSR)."""
+    print(f"{'nodes':>8} {'generator':>10} {'time_s':>9} {'edges':>9} {'validate_s':>10}")
+    for n in args.sizes:
+        p = args.degree / max(1, n - 1)
+        if n <= DICT_GEN_MAX_NODES:
+            adj, dt = timed(generate_random_graph, n, p, args.seed)
+            print(f"{n:>8} {'dict':>10} {dt:>9.3f} {count_edges(adj):>9}")
+        else:
+            print(f"{n:>8} {'dict':>10} {'skipped':>9}")
+        csr, dt = timed(generate_random_graph_csr, n, p, args.seed)
+        coloring = {v: f"C{v % args.colors}" for v in range(n)}
+        _, dv = timed(is_valid_coloring, csr, coloring)
+        print(f"{n:>8} {'csr':>10} {dt:>9.3f} {count_edges(csr):>9} {dv:>10.3f}")
+
+
+def bench_local(args):
+    """Local search (DSATUR / random start) on CSR maps; iterations/second and time."""
+    colors = [f"C{i+1}" for i in range(args.colors)]
+    print(f"{'nodes':>8} {'start':>7} {'time_s':>8} {'iters':>9} {'iters/s':>9}  result")
+    for n in args.sizes:
+        adj = generate_random_graph_csr(n, args.degree / max(1, n - 1), args.seed)
+        for start in ("dsatur", "random"):
+            sol, dt = timed(solve_map_coloring_local, adj, colors, seed=args.seed,
+                            time_limit=args.time_limit, warm_start=start)
+            if sol is None:
+                print(f"{n:>8} {start:>7} {dt:>8.2f} {'-':>9} {'-':>9}  no solution within budget")
+                continue
+            stats = pop_stats(sol)
+            print(f"{n:>8} {start:>7} {dt:>8.2f} {stats['iters']:>9} {stats['iters_per_sec']:>9}  valid")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="task3 map-coloring solver benchmarks.")
+    ap.add_argument("--colors", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=7)
+    sub = ap.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("engines", help="set-based vs bitset solver on large sparse graphs")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--degree", type=float, default=3.0, help="average node degree")
+    p.set_defaults(fn=bench_engines)
+
+    p = sub.add_parser("propagation", help="forward checking vs MAC near the colorability threshold")
+    p.add_argument("--nodes", type=int, default=60)
+    p.add_argument("--seeds", type=int, default=10)
+    p.add_argument("--degrees", type=float, nargs="+", default=[6.0, 7.0, 8.0, 8.5, 9.0, 10.0])
+    p.set_defaults(fn=bench_propagation)
+
+    p = sub.add_parser("search", help="backjumping, nogood learning and restarts on hard instances")
+    p.add_argument("--nodes", type=int, default=70)
+    p.add_argument("--seeds", type=int, default=10)
+    p.add_argument("--degrees", type=float, nargs="+", default=[7.5, 8.0, 8.5])
+    p.set_defaults(fn=bench_search)
+
+    p = sub.add_parser("stack", help="recursive baseline vs explicit-stack solvers (time, peak memory)")
+    p.add_argument("--sizes", type=int, nargs="+", default=[500, 900, 2000, 100000, 300000])
+    p.add_argument("--degree", type=float, default=3.0, help="average node degree")
+    p.set_defaults(fn=bench_stack)
+
+    p = sub.add_parser("generate", help="random graph generation: pair loop vs NumPy CSR")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 100000, 1000000])
+    p.add_argument("--degree", type=float, default=3.0, help="average node degree")
+    p.set_defaults(fn=bench_generate)
+
+    p = sub.add_parser("local", help="min-conflicts/tabu local search on large maps")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--degree", type=float, default=7.0, help="average node degree")
+    p.add_argument("--time-limit", type=float, default=30.0)
+    p.set_defaults(fn=bench_local)
+
+    args = ap.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import os
-from joblib import load
+import re
+import sys
+from collections import OrderedDict
 
 MODEL_PATH = os.path.join("models", "best_model.joblib")
+CACHE_SIZE = 4096   # MoodPredictor: transformed messages kept (LRU)
+BATCH_SIZE = 256    # piped input: messages vectorized per call
 
 LABELS = {
     0: "ANGRY",
@@ -34,16 +38,136 @@ def force_neutral(msg: str) -> bool:
         return True
     return False
 
+_WHITESPACE = re.compile(r"\s\s+")
+
+class MoodPredictor:
+    """
+    Fast inference around the trained Pipeline (vectorizer + classifier).
+    The vectorizer output (and predicted label) of every message is kept in
+    an LRU keyed by its normalized text, so a repeated message skips the
+    pure-Python analyzer; predict_many vectorizes and classifies all cache
+    misses of a batch in one call. Predictions are identical to model.predict.
+    """
+
+    def __init__(self, model, cache_size: int = CACHE_SIZE):
+        self.model = model
+        self.vectorizer = model[:-1]
+        self.clf = model[-1]
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = self.misses = 0
+
+        # the key may only drop what the vectorizer ignores anyway: runs of
+        # whitespace (every built-in analyzer collapses them) and case when it lowercases
+        vec = model[0]
+        builtin = not callable(getattr(vec, "analyzer", None)) and getattr(vec, "preprocessor", None) is None
+        self._collapse = builtin and hasattr(vec, "build_analyzer")
+        self._lower = self._collapse and getattr(vec, "lowercase", False)
+
+        # first call builds the analyzer, stop word list and regexes: pay for it now
+        self.predict_many(["warm up"])
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def normalize(self, msg: str) -> str:
+        if self._collapse:
+            msg = _WHITESPACE.sub(" ", msg)
+        return msg.lower() if self._lower else msg
+
+    def _lookup(self, msgs):
+        """Normalized keys, and (indices, data, label) for every distinct key, vectorizing and classifying only cache misses."""
+        keys = [self.normalize(m) for m in msgs]
+        entries = {}
+        for k in keys:
+            entry = self._cache.get(k)
+            if entry is not None:
+                self._cache.move_to_end(k)
+                entries[k] = entry
+        missing = list(dict.fromkeys(k for k in keys if k not in entries))
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            X = self.vectorizer.transform(missing).tocsr()
+            self._n_features = X.shape[1]
+            # each entry copies its own row out of X's arrays (X[i] costs more than the
+            # whole prediction), so the cache holds cache_size rows, not their batches
+            ptr = X.indptr
+            for i, (k, p) in enumerate(zip(missing, self.clf.predict(X).tolist())):
+                row = slice(ptr[i], ptr[i + 1])
+                entries[k] = self._cache[k] = (X.indices[row].copy(), X.data[row].copy(), p)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return keys, entries
+
+    def transform_many(self, msgs):
+        """Sparse (n, features) matrix of the vectorized messages."""
+        import numpy as np
+        from scipy.sparse import csr_matrix
+        keys, entries = self._lookup(msgs)
+        rows = [entries[k] for k in keys]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r[0]) for r in rows], out=indptr[1:])
+        indices = np.concatenate([r[0] for r in rows]) if rows else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0)
+        return csr_matrix((data, indices, indptr), shape=(len(rows), self._n_features))
+
+    def predict_many(self, msgs):
+        """Model labels (ints) for a list of messages."""
+        if not msgs:
+            return []
+        keys, entries = self._lookup(msgs)
+        return [int(entries[k][2]) for k in keys]
+
+    def predict(self, msg: str) -> int:
+        return self.predict_many([msg])[0]
+
+def describe(pred: int) -> str:
+    """Display label for a model prediction."""
+    # If model is 2-class, treat label 1 as FORGIVING
+    if pred == 1 and 2 in LABELS:
+        # could be NEUTRAL or FORGIVING depending on training.
+        # We'll assume 2-class training means 1=FORGIVING.
+        return LABELS[2]
+    if pred == 0:
+        return LABELS[0]
+    return LABELS.get(pred, f"UNKNOWN({pred})")
+
+def classify_stream(predictor: MoodPredictor, lines, batch_size: int = BATCH_SIZE):
+    """Piped input: queue messages and classify them batch_size at a time; prints one result per line."""
+    batch = []
+
+    def flush():
+        model_msgs = [m for m in batch if not force_neutral(m)]
+        preds = iter(predictor.predict_many(model_msgs))
+        for m in batch:
+            label = f"{LABELS[1]} (rule)" if force_neutral(m) else f"{describe(next(preds))} (model)"
+            print(f"{label}\t{m}")
+        batch.clear()
+
+    for line in lines:
+        batch.append(line.rstrip("\n"))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
 def main():
-    print("Boss mood interpreter (OFFLINE, 3-class with neutral rule)")
-    print("Rule: greetings / very short messages => NEUTRAL\n")
+    # piped input (python boss_chat.py < messages.txt): classify in batches, no prompt
+    interactive = sys.stdin.isatty()
+    if interactive:
+        print("Boss mood interpreter (OFFLINE, 3-class with neutral rule)")
+        print("Rule: greetings / very short messages => NEUTRAL\n")
 
     if not os.path.exists(MODEL_PATH):
         print("⚠️ Model not found at:", MODEL_PATH)
         print("Run train_models.py first.\n")
         return
 
-    model = load(MODEL_PATH)
+    # joblib (and sklearn, when unpickling) is slow to import: load it only once we need the model
+    from joblib import load
+    predictor = MoodPredictor(load(MODEL_PATH))
+    if not interactive:
+        classify_stream(predictor, sys.stdin)
+        return
 
     while True:
         msg = input("Boss> ")
@@ -55,23 +179,8 @@ def main():
             continue
 
         # If you trained only 2-class model, this will output 0/1.
-        pred = int(model.predict([msg])[0])
-
-        # Map 2-class models: 0=ANGRY, 1=FORGIVING
-        if pred in (0, 1) and 2 not in LABELS:
-            pass
-
-        # If model is 2-class, treat label 1 as FORGIVING
-        if pred == 1 and 2 in LABELS:
-            # could be NEUTRAL or FORGIVING depending on training.
-            # We'll assume 2-class training means 1=FORGIVING.
-            print("Prediction:", LABELS[2], "(model)\n")
-        elif pred == 0:
-            print("Prediction:", LABELS[0], "(model)\n")
-        elif pred == 1:
-            print("Prediction:", LABELS[1], "(model)\n")
-        else:
-            print("Prediction:", LABELS.get(pred, f"UNKNOWN({pred})"), "(model)\n")
+        pred = predictor.predict(msg)
+        print("Prediction:", describe(pred), "(model)\n")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,37 @@
 DB_DIR = "faces_db"
 MODEL_PATH = "lbph_model.yml"
 LABELS_PATH = "labels.npy"
+GALLERY_PATH = "gallery.lbp"  # binary histograms + labels + names (gallery.py); preferred by realtime when present
+DB_CACHE_DIR = "faces_cache"  # packed copy of faces_db (faces.npy + index.npz), rebuilt incrementally
+LOAD_WORKERS = 8              # threads decoding images (cv2.imread releases the GIL)
 
 FACE_SIZE = (160, 160)
 CONF_THRESHOLD = 70  # lower=stricter, higher=more permissive
+ROC_REPORT_PATH = "roc_report.csv"  # threshold sweep written by train.py (accuracy / FAR / FRR per threshold)
+
+# enrollment quality gate (quality.py)
+MIN_SHARPNESS = 20.0          # variance of the Laplacian; motion-blurred crops score < 10
+BRIGHTNESS_RANGE = (15, 240)  # mean gray level outside this is too dark / washed out
+DEDUP_BLUR = 2.0              # Gaussian sigma before the dedup LBP histogram (sensor noise alone moves raw LBP a lot)
+DEDUP_DIST = 15.0             # chi-square below this to a saved sample = redundant crop
+PRUNE_KEEP = 20               # quality.py prune: samples kept per person
+PRUNED_DIR = "faces_pruned"   # pruned samples are moved here, not deleted
 CAM_INDEX = 0
+
+# realtime detect-then-track
+DETECT_EVERY = 5        # full Haar detection every N frames, template tracking in between
+DETECT_SCALE = 1.0      # <1 runs the detector on a downscaled frame (faster, misses small faces)
+ROI_MARGIN = 0.5        # largest-face mode: search the last face grown by this fraction per side
+FULL_SCAN_EVERY = 15    # ... and still scan the whole frame every N frames for newcomers
+RECOG_REFRESH = 30      # re-run LBPH on a track after this many frames
+TRACK_IOU = 0.3         # min overlap to match a detection to an existing track
+TRACK_MIN_SCORE = 0.5   # template-match score below which a track is lost
+TRACK_MAX_MISSES = 2    # detection rounds a track may go unmatched before it is dropped
+PIPELINE_QUEUE_SIZE = 2 # threaded realtime: frames buffered between stages (oldest dropped)
+RELOAD_CHECK_SECONDS = 1.0  # realtime polls MODEL_PATH's mtime this often and hot-reloads a new model
+
+# face_server.py: one shared recognizer for many camera clients
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 5005
+BATCH_WINDOW_MS = 5.0   # requests arriving within this window are recognized as one batch
+BATCH_MAX = 64          # ... up to this many crops per batch
@@ -1,30 +1,67 @@
 import os
 import cv2
 
-from config import DB_DIR, CAM_INDEX
-from utils import ensure_dir, load_face_detector, detect_largest_face, crop_and_resize
+from config import DB_DIR, CAM_INDEX, MODEL_PATH
+from utils import ensure_dir, load_face_detector, crop_and_resize, FaceDetector
+from sources import open_source
+from train import add_person
+from quality import SampleGate, next_sample_index
 
-def enroll_person(name: str, samples: int = 30):
+def enroll_person(name: str, samples: int = 30, source=CAM_INDEX, headless: bool = False):
+    """
+    source: camera index, video file or image directory (see sources.open_source).
+    headless: no window; every frame with a face is saved until `samples` is reached.
+    Crops failing the quality gate (blurry, badly exposed, or a near-duplicate
+    of a sample the person already has) are not saved.
+    Returns the paths of the saved samples.
+    """
     ensure_dir(DB_DIR)
     person_dir = os.path.join(DB_DIR, name)
     ensure_dir(person_dir)
+    gate = SampleGate.for_dir(person_dir)
+    # continue after earlier sessions' samples, kept or pruned, instead of overwriting them
+    first = next_sample_index(name)
 
-    det = load_face_detector()
-    cap = cv2.VideoCapture(CAM_INDEX)
-    if not cap.isOpened():
-        raise RuntimeError("Webcam not accessible.")
+    det = FaceDetector(load_face_detector())
+    cap = open_source(source)
 
     print(f"[ENROLL] {name} | target={samples}")
-    print("SPACE = save sample | ESC = quit")
+    if not headless:
+        print("SPACE = save sample | ESC = quit")
+
+    saved = rejected = 0
+    saved_paths = []
+    status = ""
+
+    def try_save(face):
+        nonlocal saved, rejected, status
+        ok, reason = gate.check(face)
+        if not ok:
+            rejected += 1
+            status = f"rejected: {reason}"
+            return
+        out = os.path.join(person_dir, f"{name}_{first + saved:03d}.png")
+        if os.path.exists(out):
+            raise RuntimeError(f"{out} already exists; not overwriting an enrolled sample.")
+        cv2.imwrite(out, face)
+        saved_paths.append(out)
+        saved += 1
+        status = ""
 
-    saved = 0
     while saved < samples:
         ok, frame = cap.read()
         if not ok:
-            continue
+            if cap.live:
+                continue
+            break
 
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        box = detect_largest_face(det, gray)
+        box = det.detect(gray)
+
+        if headless:
+            if box is not None:
+                try_save(crop_and_resize(gray, box))
+            continue
 
         if box is not None:
             x, y, w, h = box
@@ -34,6 +71,8 @@ def enroll_person(name: str, samples: int = 30):
         else:
             cv2.putText(frame, "No face detected", (10, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+        if status:
+            cv2.putText(frame, status, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
 
         cv2.imshow("Enroll", frame)
         key = cv2.waitKey(1) & 0xFF
@@ -41,16 +80,20 @@ def enroll_person(name: str, samples: int = 30):
         if key == 27:  # ESC
             break
         if key == 32 and box is not None:  # SPACE
-            face = crop_and_resize(gray, box)
-            out = os.path.join(person_dir, f"{name}_{saved:03d}.png")
-            cv2.imwrite(out, face)
-            saved += 1
+            try_save(crop_and_resize(gray, box))
 
     cap.release()
-    cv2.destroyAllWindows()
-    print(f"[ENROLL] saved {saved} samples -> {person_dir}")
+    if not headless:
+        cv2.destroyAllWindows()
+    print(f"[ENROLL] saved {saved} samples -> {person_dir} | rejected {rejected} (blurry/exposure/duplicate)")
+    return saved_paths
 
 if __name__ == "__main__":
     name = input("Citizen name: ").strip()
     samples = int(input("Samples (30 recommended): ").strip() or "30")
-    enroll_person(name, samples=samples)
+    paths = enroll_person(name, samples=samples)
+    if paths and os.path.exists(MODEL_PATH):
+        # add the new samples to the existing model; a running realtime.py picks it up
+        add_person(name, paths)
+    else:
+        print("[ENROLL] no model yet: run train.py")
@@ -0,0 +1,254 @@
+"""
+Local recognition server: one copy of the gallery and cascade shared by
+many camera clients over localhost TCP (or a Unix socket). Crops that
+arrive within BATCH_WINDOW_MS are recognized together in one
+recognize_batch call.
+
+    python face_server.py                       # 127.0.0.1:5005
+    python face_server.py --unix /tmp/faces.sock
+
+Protocol (little endian): request header kind(4s) n h w (uint32), then
+n*h*w uint8 gray pixels. kind b"CROP" sends n FACE_SIZE crops, b"FRAM" one
+gray frame the server detects faces in. The reply is a uint32 length and a
+JSON list of {"box", "label", "name", "conf"} (box is null for crops),
+or {"error": message}.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from config import SERVER_HOST, SERVER_PORT, BATCH_WINDOW_MS, BATCH_MAX, FACE_SIZE
+from recognition import load_index, recognize_batch
+from utils import load_face_detector, detect_faces, crop_and_resize, MIN_FACE
+
+_REQUEST = struct.Struct("<4sIII")
+_LENGTH = struct.Struct("<I")
+MAX_PIXELS = 64 * 1024 * 1024   # refuse requests larger than this
+
+def recv_exact(sock, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+def send_reply(sock, obj):
+    data = json.dumps(obj).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+class _Pending:
+    def __init__(self, crops):
+        self.crops = crops
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[Exception] = None
+
+class Batcher:
+    """
+    Collects crops from concurrent submit() calls and recognizes them in one
+    batch: the first request opens a window of window_ms, the batch closes
+    when it expires, max_batch crops are waiting or every connected client
+    has a request in it (nobody else can add to it).
+    """
+
+    def __init__(self, index, window_ms: float = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX):
+        self.index = index
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._q = queue.Queue()
+        self.batches = 0
+        self.crops = 0
+        self.clients = 0            # open connections, maintained by the server
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, crops: np.ndarray):
+        """(labels, names, confs) for a (n, h, w) stack; blocks until its batch is done."""
+        p = _Pending(crops)
+        self._q.put(p)
+        p.done.wait()
+        if p.error is not None:
+            raise p.error
+        return p.result
+
+    def _run(self):
+        while True:
+            batch = [self._q.get()]
+            size = len(batch[0].crops)
+            deadline = time.perf_counter() + self.window
+            while size < self.max_batch and len(batch) < self.clients:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    p = self._q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(p)
+                size += len(p.crops)
+
+            try:
+                labels, names, confs = recognize_batch(np.concatenate([p.crops for p in batch]), self.index)
+            except Exception as e:
+                for p in batch:
+                    p.error = e
+                    p.done.set()
+                continue
+            self.batches += 1
+            self.crops += size
+            s = 0
+            for p in batch:
+                e = s + len(p.crops)
+                p.result = (labels[s:e], names[s:e], confs[s:e])
+                p.done.set()
+                s = e
+
+class FaceServer:
+    """Gallery, cascade and batcher shared by all client connections."""
+
+    def __init__(self, window_ms: float = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX, prune=None):
+        self.batcher = Batcher(load_index(prune), window_ms, max_batch)
+        self.detector = load_face_detector()
+        self._det_lock = threading.Lock()   # one CascadeClassifier, not safe to share across threads
+        self._clients_lock = threading.Lock()
+        self.requests = 0
+
+    def handle(self, kind: bytes, pixels: np.ndarray) -> List[dict]:
+        with self._clients_lock:
+            self.requests += 1
+        boxes = [None] * len(pixels)
+        if kind == b"FRAM":
+            n, h, w = pixels.shape
+            if n != 1 or min(h, w) < MIN_FACE:
+                raise ValueError(f"expected one gray frame of at least {MIN_FACE}x{MIN_FACE}, got {n}x{h}x{w}")
+            gray = pixels[0]
+            with self._det_lock:
+                boxes = detect_faces(self.detector, gray)
+            if not boxes:
+                return []
+            pixels = np.stack([crop_and_resize(gray, b) for b in boxes])
+        elif kind != b"CROP":
+            raise ValueError(f"unknown request kind {kind!r}")
+        elif pixels.shape[1:] != (FACE_SIZE[1], FACE_SIZE[0]):
+            # checked here: a bad crop inside a shared batch would fail the other clients' requests too
+            raise ValueError(f"expected {FACE_SIZE[0]}x{FACE_SIZE[1]} crops, got {pixels.shape[2]}x{pixels.shape[1]}")
+        elif not len(pixels):
+            return []
+
+        labels, names, confs = self.batcher.submit(pixels)
+        return [{"box": None if b is None else [int(v) for v in b], "label": int(l),
+                 "name": str(n), "conf": float(c)}
+                for b, l, n, c in zip(boxes, labels, names, confs)]
+
+    def make_handler(self):
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def setup(self):
+                with server._clients_lock:
+                    server.batcher.clients += 1
+
+            def finish(self):
+                with server._clients_lock:
+                    server.batcher.clients -= 1
+
+            def handle(self):
+                sock = self.request
+                while True:
+                    try:
+                        kind, n, h, w = _REQUEST.unpack(recv_exact(sock, _REQUEST.size))
+                        if n * h * w > MAX_PIXELS:
+                            raise ValueError(f"request of {n}x{h}x{w} pixels is too large")
+                        pixels = np.frombuffer(recv_exact(sock, n * h * w), dtype=np.uint8).reshape(n, h, w)
+                    except (ConnectionError, OSError):
+                        return
+                    except ValueError as e:
+                        send_reply(sock, {"error": str(e)})
+                        return
+                    try:
+                        send_reply(sock, server.handle(kind, pixels))
+                    except (ValueError, RuntimeError) as e:
+                        send_reply(sock, {"error": str(e)})
+
+        return Handler
+
+class FaceClient:
+    """One camera's connection to face_server.py."""
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT, unix: Optional[str] = None):
+        if unix:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _request(self, kind: bytes, pixels: np.ndarray) -> List[dict]:
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        n, h, w = pixels.shape
+        self.sock.sendall(_REQUEST.pack(kind, n, h, w) + pixels.tobytes())
+        (length,) = _LENGTH.unpack(recv_exact(self.sock, _LENGTH.size))
+        reply = json.loads(recv_exact(self.sock, length).decode("utf-8"))
+        if isinstance(reply, dict):
+            raise RuntimeError(f"server: {reply['error']}")
+        return reply
+
+    def recognize_crops(self, crops: np.ndarray) -> List[dict]:
+        """crops: (n, 160, 160) or one (160, 160) uint8 gray face."""
+        crops = np.asarray(crops)
+        return self._request(b"CROP", crops[None] if crops.ndim == 2 else crops)
+
+    def recognize_frame(self, gray: np.ndarray) -> List[dict]:
+        """Detect and recognize every face in a gray frame."""
+        return self._request(b"FRAM", np.asarray(gray)[None])
+
+    def close(self):
+        self.sock.close()
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, unix: Optional[str] = None,
+          window_ms: float = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX, prune=None):
+    face_server = FaceServer(window_ms, max_batch, prune)
+    handler = face_server.make_handler()
+    if unix:
+        if os.path.exists(unix):
+            os.remove(unix)
+        srv = socketserver.ThreadingUnixStreamServer(unix, handler)
+        where = unix
+    else:
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        srv = socketserver.ThreadingTCPServer((host, port), handler)
+        where = f"{host}:{port}"
+    srv.daemon_threads = True
+    n_people = len(face_server.batcher.index.label_to_name)
+    print(f"[SERVER] {n_people} people, batch window {window_ms:g} ms / max {max_batch} | listening on {where}",
+          flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        b = face_server.batcher
+        print(f"[SERVER] {face_server.requests} requests, {b.crops} crops in {b.batches} batches "
+              f"(mean {b.crops / max(1, b.batches):.1f} per batch)")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Shared face recognition server for camera clients.")
+    ap.add_argument("--host", default=SERVER_HOST)
+    ap.add_argument("--port", type=int, default=SERVER_PORT)
+    ap.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    ap.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS)
+    ap.add_argument("--max-batch", type=int, default=BATCH_MAX)
+    ap.add_argument("--prune", type=int, default=None, help="people kept by centroid pruning")
+    args = ap.parse_args()
+    serve(args.host, args.port, args.unix, args.window_ms, args.max_batch, args.prune)
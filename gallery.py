@@ -0,0 +1,122 @@
+"""
+Binary LBP gallery: raw float32 histograms + int32 labels + a name table
+in one file, memory-mapped on load, replacing lbph_model.yml (text YAML)
+and labels.npy (pickle) at recognition time.
+
+Layout (little endian, every section 64-byte aligned):
+    header   magic "LBPG", version, n, dim, radius, neighbors, grid_x, grid_y, names_bytes
+    names    JSON {label: name}, utf-8
+    labels   int32[n]    sorted, see lbp.LBPIndex
+    sums     float32[n]  per-sample histogram sums
+    bins     float32[dim, n]  histograms, bin-major
+
+    python gallery.py convert          # lbph_model.yml + labels.npy -> gallery.lbp
+    python gallery.py bench            # startup time: YAML + npy vs gallery
+"""
+import argparse
+import json
+import os
+import struct
+import time
+from typing import Dict
+
+import numpy as np
+
+from config import MODEL_PATH, LABELS_PATH, GALLERY_PATH
+from lbp import LBPIndex, RADIUS, NEIGHBORS, GRID
+
+MAGIC = b"LBPG"
+VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct("<4s8I")
+
+def _pad(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def save_gallery(index: LBPIndex, path: str = GALLERY_PATH):
+    """Write the index atomically (temp file + os.replace), so readers see the old or the new gallery."""
+    dim, n = index.bins.shape
+    names = json.dumps({str(k): v for k, v in index.label_to_name.items()}).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, n, dim, RADIUS, NEIGHBORS, GRID[0], GRID[1], len(names))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        for block in (header, names, index.labels.astype("<i4").tobytes(), index.sums.astype("<f4").tobytes()):
+            f.write(block)
+            f.write(b"\0" * (_pad(f.tell()) - f.tell()))
+        # bins can be large: stream them row by row instead of one big tobytes()
+        for s in range(0, dim, 1024):
+            f.write(np.ascontiguousarray(index.bins[s:s + 1024], dtype="<f4").tobytes())
+    os.replace(tmp, path)
+
+def load_gallery(path: str = GALLERY_PATH, prune=None) -> LBPIndex:
+    """LBPIndex over a memory-mapped gallery file: only the header, names and labels are read eagerly."""
+    with open(path, "rb") as f:
+        magic, version, n, dim, radius, neighbors, gx, gy, names_len = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise RuntimeError(f"{path} is not a version {VERSION} LBP gallery.")
+        if (radius, neighbors, (gx, gy)) != (RADIUS, NEIGHBORS, GRID):
+            raise RuntimeError(f"{path}: LBP parameters {radius}/{neighbors}/{gx}x{gy} do not match lbp.py.")
+        off = _pad(_HEADER.size)
+        f.seek(off)
+        names = {int(k): v for k, v in json.loads(f.read(names_len).decode("utf-8")).items()}
+
+    off = _pad(off + names_len)
+    labels = np.fromfile(path, dtype="<i4", count=n, offset=off)
+    off = _pad(off + 4 * n)
+    sums = np.fromfile(path, dtype="<f4", count=n, offset=off)
+    off = _pad(off + 4 * n)
+    bins = np.memmap(path, dtype="<f4", mode="r", offset=off, shape=(dim, n))
+    return LBPIndex(bins, labels, names, prune=prune, bin_major=True, sums=sums)
+
+def gallery_is_current(path: str = GALLERY_PATH, model_path: str = MODEL_PATH) -> bool:
+    """True when the gallery exists and is not older than the YAML model it mirrors."""
+    if not os.path.exists(path):
+        return False
+    return not os.path.exists(model_path) or os.path.getmtime(path) >= os.path.getmtime(model_path)
+
+def convert(model_path: str = MODEL_PATH, labels_path: str = LABELS_PATH, out: str = GALLERY_PATH):
+    """Existing lbph_model.yml + labels.npy -> binary gallery."""
+    import cv2
+    if not hasattr(cv2, "face"):
+        raise RuntimeError("cv2.face not found. Install opencv-contrib-python.")
+    label_to_name: Dict[int, str] = np.load(labels_path, allow_pickle=True).item()
+    model = cv2.face.LBPHFaceRecognizer_create()
+    model.read(model_path)
+    index = LBPIndex.from_model(model, label_to_name)
+    save_gallery(index, out)
+    print(f"[GALLERY] {len(index.labels)} histograms, {len(label_to_name)} people -> {out} "
+          f"({os.path.getsize(out) / 1e6:.1f} MB, was {os.path.getsize(model_path) / 1e6:.1f} MB YAML)")
+
+def bench_startup(repeat: int = 5):
+    """Time to a first prediction: YAML model + pickled labels vs memory-mapped gallery."""
+    import cv2
+    face = np.full((160, 160), 128, dtype=np.uint8)
+
+    def yaml_path():
+        labels = np.load(LABELS_PATH, allow_pickle=True).item()
+        model = cv2.face.LBPHFaceRecognizer_create()
+        model.read(MODEL_PATH)
+        return model.predict(face), labels
+
+    def gallery_path():
+        index = load_gallery()
+        return index.predict(face), index.label_to_name
+
+    for name, fn in (("yaml+npy", yaml_path), ("gallery", gallery_path)):
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - t0) * 1000.0)
+        print(f"[GALLERY] {name:>9}: load + first predict {np.median(times):8.1f} ms (median of {repeat})")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Binary LBP gallery tools.")
+    ap.add_argument("command", choices=["convert", "bench"])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    if args.command == "convert":
+        convert()
+    else:
+        bench_startup(args.repeat)
@@ -0,0 +1,198 @@
+"""
+NumPy LBP features and a vectorized nearest-neighbour index, a drop-in
+for cv2.face.LBPHFaceRecognizer.predict (radius=1, neighbors=8, 8x8 grid,
+as in train.train_model).
+
+Histograms match OpenCV's bit for bit, so an index can be built straight
+from a trained model (LBPIndex.from_model), and distances are the same
+chi-square confidences CONF_THRESHOLD is tuned on (float32 accumulation:
+they agree with OpenCV's to about 1e-2).
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+RADIUS = 1
+NEIGHBORS = 8
+GRID = (8, 8)          # (grid_x, grid_y)
+BINS = 1 << NEIGHBORS
+
+
+def _sampling_points():
+    """OpenCV's circular neighbourhood: per neighbour, 4 (dy, dx, weight) bilinear taps (float32 like elbp_)."""
+    taps = []
+    for n in range(NEIGHBORS):
+        x = np.float32(RADIUS * np.cos(2.0 * np.pi * n / float(NEIGHBORS)))
+        y = np.float32(-RADIUS * np.sin(2.0 * np.pi * n / float(NEIGHBORS)))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        ty, tx = np.float32(y - fy), np.float32(x - fx)
+        one = np.float32(1)
+        taps.append(((fy, fx, (one - tx) * (one - ty)), (fy, cx, tx * (one - ty)),
+                     (cy, fx, (one - tx) * ty), (cy, cx, tx * ty)))
+    return taps
+
+
+_TAPS = _sampling_points()
+_EPS = np.finfo(np.float32).eps
+
+
+def lbp_codes(faces: np.ndarray) -> np.ndarray:
+    """LBP code images for a (N, h, w) or (h, w) uint8 stack -> (N, h-2r, w-2r) uint8."""
+    faces = np.asarray(faces)
+    if faces.ndim == 2:
+        faces = faces[None]
+    r = RADIUS
+    h, w = faces.shape[1] - 2 * r, faces.shape[2] - 2 * r
+    src = faces.astype(np.float32)
+    center = src[:, r:r+h, r:r+w]
+    codes = np.zeros((faces.shape[0], h, w), dtype=np.uint8)
+    for n, taps in enumerate(_TAPS):
+        t = None
+        for dy, dx, wt in taps:
+            term = wt * src[:, r+dy:r+dy+h, r+dx:r+dx+w]
+            t = term if t is None else t + term
+        codes |= (((t > center) | (np.abs(t - center) < _EPS)).astype(np.uint8) << n)
+    return codes
+
+
+def lbp_histograms(faces: np.ndarray) -> np.ndarray:
+    """Spatial LBP histograms, (N, grid_x*grid_y*256) float32, each cell normalised to sum 1."""
+    codes = lbp_codes(faces)
+    n, h, w = codes.shape
+    gx, gy = GRID
+    ch, cw = h // gy, w // gx
+    # (N, gy, ch, gx, cw) -> per image and cell, the codes of its pixels
+    cells = codes[:, :gy * ch, :gx * cw].reshape(n, gy, ch, gx, cw).transpose(0, 1, 3, 2, 4)
+    cell_id = np.arange(n * gy * gx, dtype=np.int64).reshape(n, gy, gx, 1, 1) * BINS
+    flat = (cell_id + cells).ravel()
+    counts = np.bincount(flat, minlength=n * gy * gx * BINS)
+    # OpenCV multiplies the float32 counts by a float32 1/total
+    hist = counts.astype(np.float32) * np.float32(1.0 / (ch * cw))
+    return hist.reshape(n, gy * gx * BINS)
+
+
+# query bins per vectorized block: bounds the temporaries to block x gallery size
+CHI_BLOCK = 512
+
+
+def chi_square(bins: np.ndarray, sums: np.ndarray, query: np.ndarray,
+               cols: slice = slice(None)) -> np.ndarray:
+    """
+    OpenCV HISTCMP_CHISQR_ALT of one query against every gallery histogram
+    (or the range `cols`), with the gallery stored bin-major: bins[d, i] = hist_i[d].
+    2 * sum((g-q)^2 / (g+q)) = 2 * (sum g + sum q - 4 * sum(g*q / (g+q))),
+    and the last sum is zero wherever q is, so only the query's non-zero bins
+    are read, each as one contiguous row over the whole gallery.
+    """
+    nz = np.flatnonzero(query)
+    q = query[nz]
+    sums = sums[cols]
+    cross = np.zeros(len(sums), dtype=np.float32)
+    for s in range(0, len(nz), CHI_BLOCK):
+        g = bins[nz[s:s + CHI_BLOCK], cols]
+        qb = q[s:s + CHI_BLOCK, None]
+        num = g * qb
+        g += qb
+        num /= g
+        cross += num.sum(axis=0)
+    # identical histograms can come out a hair below zero in float32
+    return np.maximum(2.0 * (sums + q.sum() - 4.0 * cross), 0.0)
+
+
+class LBPIndex:
+    """
+    All gallery histograms as one dense float32 matrix (stored bin-major,
+    see chi_square), matched in a single vectorized pass per query.
+    predict() mirrors the OpenCV recognizer (nearest neighbour label,
+    chi-square distance as confidence).
+
+    hists is (N, D), or already bin-major (D, N) with bin_major=True; a
+    memory-mapped bin-major matrix is used in place (see gallery.py), and
+    passing its precomputed per-sample `sums` avoids reading it all up front.
+
+    prune: when set, rank people by the distance to their centroid histogram
+    first and search only the samples of the `prune` closest people
+    (approximate; exact when None).
+    """
+
+    def __init__(self, hists: np.ndarray, labels: np.ndarray,
+                 label_to_name: Optional[Dict[int, str]] = None, prune: Optional[int] = None,
+                 bin_major: bool = False, sums: Optional[np.ndarray] = None):
+        hists = np.asarray(hists, dtype=np.float32)
+        bins = hists if bin_major else hists.T
+        labels = np.asarray(labels, dtype=np.int32).ravel()
+        if bins.shape[1] != len(labels):
+            raise ValueError("hists and labels differ in length")
+        # gallery sorted by label: each person's samples are one column range
+        order = np.argsort(labels, kind="stable")
+        if np.any(order != np.arange(len(order))):
+            bins, labels = bins[:, order], labels[order]
+            sums = None if sums is None else np.asarray(sums)[order]
+        self.bins = np.ascontiguousarray(bins)
+        self.labels = labels
+        self.sums = self.bins.sum(axis=0) if sums is None else np.asarray(sums, dtype=np.float32)
+        self.label_to_name = label_to_name or {}
+        self.prune = prune
+
+        self.people, first = np.unique(self.labels, return_index=True)
+        self.starts = np.append(first, len(self.labels))
+        self._centroids = None
+
+    def centroids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Bin-major per-person mean histograms and their sums (built on first use)."""
+        if self._centroids is None:
+            counts = np.diff(self.starts).astype(np.float32)
+            c_bins = np.add.reduceat(self.bins, self.starts[:-1], axis=1) / counts
+            self._centroids = (c_bins, c_bins.sum(axis=0))
+        return self._centroids
+
+    @classmethod
+    def from_faces(cls, faces, labels, label_to_name=None, prune=None, chunk: int = 256) -> "LBPIndex":
+        faces = np.asarray(faces)
+        bins = np.empty((GRID[0] * GRID[1] * BINS, len(faces)), dtype=np.float32)
+        for s in range(0, len(faces), chunk):
+            bins[:, s:s + chunk] = lbp_histograms(faces[s:s + chunk]).T
+        return cls(bins, labels, label_to_name, prune, bin_major=True)
+
+    @classmethod
+    def from_model(cls, model, label_to_name=None, prune=None) -> "LBPIndex":
+        """Reuse the histograms already stored in a trained cv2 LBPH model."""
+        hists = np.vstack([h.reshape(1, -1) for h in model.getHistograms()])
+        return cls(hists, model.getLabels(), label_to_name, prune)
+
+    def search(self, query: np.ndarray) -> Tuple[int, float]:
+        """(row, distance) of the nearest gallery histogram to one query histogram."""
+        if self.prune is None or self.prune >= len(self.people):
+            d = chi_square(self.bins, self.sums, query)
+            best = int(np.argmin(d))
+            return best, float(d[best])
+
+        c_bins, c_sums = self.centroids()
+        d = chi_square(c_bins, c_sums, query)
+        best_row, best_dist = -1, np.inf
+        for p in np.argpartition(d, self.prune)[:self.prune]:
+            lo, hi = int(self.starts[p]), int(self.starts[p + 1])
+            d = chi_square(self.bins, self.sums, query, slice(lo, hi))
+            i = int(np.argmin(d))
+            if d[i] < best_dist:
+                best_row, best_dist = lo + i, float(d[i])
+        return best_row, best_dist
+
+    def predict(self, face: np.ndarray) -> Tuple[int, float]:
+        """(label, confidence) for one face crop, like LBPHFaceRecognizer.predict."""
+        row, dist = self.search(lbp_histograms(face)[0])
+        return int(self.labels[row]), dist
+
+    def predict_many(self, faces: np.ndarray, chunk: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """Labels (int32) and confidences (float32) for a (N, h, w) stack; features are extracted per chunk."""
+        faces = np.asarray(faces)
+        if faces.ndim == 2:
+            faces = faces[None]
+        labels = np.empty(len(faces), dtype=np.int32)
+        dists = np.empty(len(faces), dtype=np.float32)
+        for s in range(0, len(faces), chunk):
+            for i, hist in enumerate(lbp_histograms(faces[s:s + chunk]), start=s):
+                row, dists[i] = self.search(hist)
+                labels[i] = self.labels[row]
+        return labels, dists
@@ -3,7 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 import numpy as np
-import matplotlib.pyplot as plt
+
+from plotting import new_figure, finish_figure
 
 Coord = Tuple[int, int]  # (row, col)
 
@@ -34,35 +35,36 @@ class GridMaze:
 
     def draw(self, start: Optional[Coord] = None, goal: Optional[Coord] = None,
              path: Optional[List[Coord]] = None, robots: Optional[List[Coord]] = None,
-             title: str = "") -> None:
+             title: str = "", out_path: Optional[str] = None) -> None:
+        """Show the maze, or with out_path save it as PNG headlessly (no blocking window)."""
         img = self.grid.copy()
 
-        plt.figure(figsize=(7, 7))
-        plt.imshow(img, interpolation="nearest")
-        plt.xticks([])
-        plt.yticks([])
+        fig, ax = new_figure((7, 7), out_path)
+        ax.imshow(img, interpolation="nearest")
+        ax.set_xticks([])
+        ax.set_yticks([])
         if title:
-            plt.title(title)
+            ax.set_title(title)
 
         # Path °❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･
         if path:
             pr = [p[0] for p in path]
             pc = [p[1] for p in path]
-            plt.plot(pc, pr, linewidth=2)
+            ax.plot(pc, pr, linewidth=2)
 
         # Start/goal
         if start is not None:
-            plt.scatter([start[1]], [start[0]], s=120, marker="o")
+            ax.scatter([start[1]], [start[0]], s=120, marker="o")
         if goal is not None:
-            plt.scatter([goal[1]], [goal[0]], s=120, marker="X")
+            ax.scatter([goal[1]], [goal[0]], s=120, marker="X")
 
         # Robots °❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･
         if robots:
             rr = [p[0] for p in robots]
             rc = [p[1] for p in robots]
-            plt.scatter(rc, rr, s=120, marker="s")
+            ax.scatter(rc, rr, s=120, marker="s")
 
-        plt.show()
+        finish_figure(fig, out_path)
 
 
 def generate_random_solvable_maze(
@@ -0,0 +1,121 @@
+"""
+Small building blocks for the threaded realtime pipeline: a latest-frame
+slot for the capture thread, drop-oldest bounded queues between stages and
+per-stage latency statistics, plus a blocking queue for sources that must
+not drop frames.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Optional, Tuple
+
+
+class LatestFrame:
+    """Single-slot buffer: the writer overwrites, readers always get the newest frame."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self.dropped = 0            # frames overwritten before anyone read them
+        self._read_seq = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._seq > self._read_seq:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Wait for a frame newer than the last one returned; None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._read_seq, timeout):
+                return None
+            self._read_seq = self._seq
+            return self._item
+
+
+class DropOldestQueue:
+    """Bounded queue that never blocks the producer: when full, the oldest item is discarded."""
+
+    def __init__(self, maxsize: int = 2):
+        self._q = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            while True:
+                try:
+                    self._q.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._q.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class BlockingQueue:
+    """
+    Bounded queue whose producer waits for room instead of dropping: file and
+    image-directory sources must process every frame. Same get() as
+    DropOldestQueue; dropped is always 0.
+    """
+
+    def __init__(self, maxsize: int = 2, stop: Optional[threading.Event] = None):
+        self._q = queue.Queue(maxsize=maxsize)
+        self._stop = stop
+        self.dropped = 0
+
+    def put(self, item):
+        """Wait until there is room (or the stop event is set, then the item is discarded)."""
+        while True:
+            try:
+                self._q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stop is not None and self._stop.is_set():
+                    return
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class StageStats:
+    """Rolling window of one stage's latencies (ms) and its throughput."""
+
+    def __init__(self, window: int = 100):
+        self._ms = deque(maxlen=window)
+        self._stamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, ms: float):
+        with self._lock:
+            self._ms.append(ms)
+            self._stamps.append(time.perf_counter())
+
+    def summary(self) -> Tuple[float, float, float]:
+        """(mean ms, p95 ms, events per second) over the window."""
+        with self._lock:
+            ms = sorted(self._ms)
+            stamps = list(self._stamps)
+        if not ms:
+            return 0.0, 0.0, 0.0
+        rate = 0.0
+        if len(stamps) > 1 and stamps[-1] > stamps[0]:
+            rate = (len(stamps) - 1) / (stamps[-1] - stamps[0])
+        return sum(ms) / len(ms), ms[min(len(ms) - 1, int(0.95 * len(ms)))], rate
@@ -0,0 +1,34 @@
+# plotting.py
+"""
+Lazy matplotlib access for the plotting helpers in task3 and maze, so
+importing those modules for solving never pays matplotlib's import cost.
+"""
+
+
+def get_pyplot():
+    """Import and return matplotlib.pyplot on first use."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def new_figure(figsize, out_path=None):
+    """
+    (fig, ax). With out_path the figure is a standalone Figure on an Agg
+    canvas, for PNG output without a display: pyplot and the process-wide
+    backend are left untouched, so later interactive plots still show.
+    """
+    if out_path is None:
+        return get_pyplot().subplots(figsize=figsize)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def finish_figure(fig, out_path=None):
+    """Save the figure from new_figure to out_path as PNG, or show it (blocking)."""
+    if out_path is not None:
+        fig.savefig(out_path, dpi=150)
+    else:
+        get_pyplot().show()
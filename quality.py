@@ -0,0 +1,169 @@
+"""
+Enrollment quality gate and gallery pruning.
+
+A crop is accepted when it is sharp enough (variance of the Laplacian),
+neither too dark nor washed out, and not a near-duplicate of a sample the
+person already has: chi-square between LBP histograms of lightly blurred
+crops, so sensor noise between two frames of the same pose does not count
+as a difference.
+
+    python quality.py prune                 # every person down to PRUNE_KEEP samples
+    python quality.py prune --person sanda --keep 10 --dry-run
+"""
+import argparse
+import os
+import re
+import shutil
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import (DB_DIR, MIN_SHARPNESS, BRIGHTNESS_RANGE, DEDUP_BLUR, DEDUP_DIST,
+                    PRUNE_KEEP, PRUNED_DIR)
+from lbp import lbp_histograms, chi_square
+from sources import IMAGE_EXTS
+from train import read_faces
+
+def sharpness(face) -> float:
+    return float(cv2.Laplacian(face, cv2.CV_64F).var())
+
+def brightness(face) -> float:
+    return float(np.mean(face))
+
+def quality_problem(face) -> Optional[str]:
+    """Why the crop is unusable, or None if it passes."""
+    s, b = sharpness(face), brightness(face)
+    if s < MIN_SHARPNESS:
+        return f"blurry (sharpness {s:.0f} < {MIN_SHARPNESS:g})"
+    if not BRIGHTNESS_RANGE[0] <= b <= BRIGHTNESS_RANGE[1]:
+        return f"bad exposure (brightness {b:.0f})"
+    return None
+
+def dedup_histograms(faces) -> np.ndarray:
+    """(N, D) LBP histograms of the blurred crops, used only to compare samples with each other."""
+    faces = np.asarray(faces)
+    if faces.ndim == 2:
+        faces = faces[None]
+    return lbp_histograms(np.stack([cv2.GaussianBlur(f, (0, 0), DEDUP_BLUR) for f in faces]))
+
+def distance_matrix(hists: np.ndarray) -> np.ndarray:
+    bins = np.ascontiguousarray(hists.T)
+    sums = bins.sum(axis=0)
+    d = np.stack([chi_square(bins, sums, h) for h in hists])
+    return np.minimum(d, d.T)   # chi-square alt is symmetric up to float32 rounding
+
+class SampleGate:
+    """Accepts a person's new crops one by one against the samples kept so far."""
+
+    def __init__(self, faces=()):
+        self.hists = dedup_histograms(faces) if len(faces) else None
+
+    @classmethod
+    def for_dir(cls, person_dir: str) -> "SampleGate":
+        return cls([f for f in read_faces(list_samples(person_dir)) if f is not None])
+
+    def check(self, face) -> Tuple[bool, Optional[str]]:
+        """(accepted, reason if rejected); accepted crops join the reference set."""
+        problem = quality_problem(face)
+        if problem:
+            return False, problem
+        hist = dedup_histograms(face)
+        if self.hists is not None:
+            bins = np.ascontiguousarray(self.hists.T)
+            d = float(chi_square(bins, bins.sum(axis=0), hist[0]).min())
+            if d < DEDUP_DIST:
+                return False, f"duplicate (distance {d:.1f} < {DEDUP_DIST:g})"
+            self.hists = np.vstack([self.hists, hist])
+        else:
+            self.hists = hist
+        return True, None
+
+def list_samples(person_dir: str) -> List[str]:
+    if not os.path.isdir(person_dir):
+        return []
+    return [os.path.join(person_dir, fn) for fn in sorted(os.listdir(person_dir))
+            if fn.lower().endswith(IMAGE_EXTS)]
+
+def next_sample_index(name: str) -> int:
+    """
+    Number for the person's next <name>_NNN.png: one past the highest in
+    DB_DIR/name and PRUNED_DIR/name, so a new sample never shares a name
+    with a pruned one (pruning leaves gaps, and a later prune moves files there).
+    """
+    pattern = re.compile(rf"{re.escape(name)}_(\d+)\.png")
+    numbers = [int(m.group(1))
+               for d in (os.path.join(DB_DIR, name), os.path.join(PRUNED_DIR, name))
+               for m in (pattern.fullmatch(os.path.basename(p)) for p in list_samples(d)) if m]
+    return max(numbers, default=-1) + 1
+
+def _free_path(path: str) -> str:
+    """path, or path with _1, _2, ... before the extension if it is taken."""
+    root, ext = os.path.splitext(path)
+    i = 0
+    while os.path.exists(path):
+        i += 1
+        path = f"{root}_{i}{ext}"
+    return path
+
+def most_diverse(hists: np.ndarray, keep: int, usable=None) -> List[int]:
+    """
+    Greedy farthest-point selection: start from the medoid (most typical
+    sample), then repeatedly add the sample farthest from everything chosen.
+    Samples with usable=False are only taken once the usable ones run out.
+    """
+    n = len(hists)
+    if keep >= n:
+        return list(range(n))
+    d = distance_matrix(hists)
+    penalty = np.zeros(n) if usable is None else np.where(usable, 0.0, 1e9)
+    chosen = [int(np.argmin(d.sum(axis=1) + penalty))]
+    nearest = d[chosen[0]].copy()
+    while len(chosen) < keep:
+        score = nearest - penalty
+        score[chosen] = -np.inf
+        i = int(np.argmax(score))
+        chosen.append(i)
+        nearest = np.minimum(nearest, d[i])
+    return sorted(chosen)
+
+def prune_person(name: str, keep: int = PRUNE_KEEP, dry_run: bool = False) -> int:
+    """Keep the `keep` most diverse samples of DB_DIR/name, move the rest to PRUNED_DIR/name. Returns the number moved."""
+    paths = list_samples(os.path.join(DB_DIR, name))
+    faces = read_faces(paths)
+    paths = [p for p, f in zip(paths, faces) if f is not None]
+    faces = [f for f in faces if f is not None]
+    if len(faces) <= keep:
+        print(f"[PRUNE] {name}: {len(faces)} samples, nothing to prune")
+        return 0
+
+    usable = np.array([quality_problem(f) is None for f in faces])
+    kept = set(most_diverse(dedup_histograms(faces), keep, usable))
+    drop = [p for i, p in enumerate(paths) if i not in kept]
+    print(f"[PRUNE] {name}: keep {keep}/{len(paths)} ({int((~usable).sum())} fail the quality gate)"
+          + (" [dry run]" if dry_run else ""))
+    if dry_run:
+        for p in drop:
+            print(f"  - {p}")
+        return len(drop)
+
+    out_dir = os.path.join(PRUNED_DIR, name)
+    os.makedirs(out_dir, exist_ok=True)
+    for p in drop:
+        # never replace an earlier pruned sample: moved, not deleted
+        shutil.move(p, _free_path(os.path.join(out_dir, os.path.basename(p))))
+    return len(drop)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Prune enrolled samples to the most diverse K per person.")
+    ap.add_argument("command", choices=["prune"])
+    ap.add_argument("--person", default=None, help="only this person (default: everyone in DB_DIR)")
+    ap.add_argument("--keep", type=int, default=PRUNE_KEEP)
+    ap.add_argument("--dry-run", action="store_true", help="list what would be moved")
+    args = ap.parse_args()
+
+    persons = [args.person] if args.person else sorted(
+        p for p in os.listdir(DB_DIR) if os.path.isdir(os.path.join(DB_DIR, p)))
+    moved = sum(prune_person(p, args.keep, args.dry_run) for p in persons)
+    if moved and not args.dry_run:
+        print(f"[PRUNE] moved {moved} samples -> {PRUNED_DIR}. Retrain: python train.py")
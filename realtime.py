@@ -1,48 +1,161 @@
+import argparse
+import dataclasses
+import os
+import threading
 import time
+from typing import Dict, Tuple
+
 import cv2
 import numpy as np
 
-from config import MODEL_PATH, LABELS_PATH, CONF_THRESHOLD, CAM_INDEX
-from utils import load_face_detector, detect_largest_face, crop_and_resize
+from config import (MODEL_PATH, LABELS_PATH, GALLERY_PATH, CONF_THRESHOLD, CAM_INDEX,
+                    DETECT_EVERY, DETECT_SCALE, RECOG_REFRESH, PIPELINE_QUEUE_SIZE,
+                    RELOAD_CHECK_SECONDS)
+from utils import load_face_detector, detect_faces, crop_and_resize
+from tracking import FaceTracker
+from pipeline import LatestFrame, DropOldestQueue, BlockingQueue, StageStats
+from sources import open_source
+from gallery import load_gallery, gallery_is_current
 
-def run_realtime():
+def load_recognizer():
+    """
+    (model, label_to_name). The memory-mapped binary gallery (gallery.py) is
+    used when it is up to date: it loads in milliseconds instead of parsing
+    the YAML model, and LBPIndex.predict matches the cv2 model's predict.
+    """
+    if gallery_is_current():
+        index = load_gallery()
+        return index, index.label_to_name
     if not hasattr(cv2, "face"):
         raise RuntimeError("cv2.face not found. Install opencv-contrib-python.")
 
     label_to_name = np.load(LABELS_PATH, allow_pickle=True).item()
     model = cv2.face.LBPHFaceRecognizer_create()
     model.read(MODEL_PATH)
+    return model, label_to_name
+
+class ModelWatcher:
+    """
+    Serves (model, label_to_name) and swaps in a fresh pair when the newest
+    mtime of MODEL_PATH and GALLERY_PATH changes (train.save_model replaces
+    both atomically), checking at most every RELOAD_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._mtime = self._newest_mtime()
+        self.current = load_recognizer()
+        self._checked = time.time()
+
+    def get(self):
+        now = time.time()
+        if now - self._checked >= RELOAD_CHECK_SECONDS:
+            self._checked = now
+            mtime = self._newest_mtime() or self._mtime
+            if mtime != self._mtime:
+                # mtime first: a write landing during the load triggers another reload
+                self._mtime = mtime
+                self.current = load_recognizer()
+                print(f"[RUN] model reloaded ({len(self.current[1])} people)")
+        return self.current
+
+    @staticmethod
+    def _newest_mtime() -> float:
+        return max((os.path.getmtime(p) for p in (MODEL_PATH, GALLERY_PATH) if os.path.exists(p)), default=0.0)
+
+def recognize(model, label_to_name, face) -> Tuple[str, float]:
+    pred, conf = model.predict(face)
+
+    name = "Unknown"
+    if conf <= CONF_THRESHOLD:
+        name = label_to_name.get(pred, "Unknown")
+    return name, conf
+
+def track_faces(det, tracker: FaceTracker, gray, frame_idx: int,
+                detect_every: int = DETECT_EVERY, scale: float = DETECT_SCALE):
+    """Haar detection every `detect_every` frames, template tracking in between."""
+    boxes = None
+    if frame_idx % detect_every == 0:
+        boxes = detect_faces(det, gray, scale=scale)
+    return tracker.update(gray, boxes)
+
+def refresh_identities(model, label_to_name, tracks, gray, frame_idx: int,
+                       refresh: int = RECOG_REFRESH, verbose: bool = True):
+    """Run LBPH only for new tracks or identities older than `refresh` frames."""
+    for t in tracks:
+        if t.recognized_at >= 0 and frame_idx - t.recognized_at < refresh:
+            continue
+        name, t.conf = recognize(model, label_to_name, crop_and_resize(gray, t.box))
+        if verbose and (t.recognized_at < 0 or name != t.name):
+            print(f"[TRACK] #{t.track_id} -> {name} (conf={t.conf:.1f})")
+        t.name = name
+        t.recognized_at = frame_idx
+
+def update_tracks(model, label_to_name, det, tracker: FaceTracker, gray, frame_idx: int,
+                  stills: bool = False):
+    """One serial step of detect-then-track plus recognition (stills: every frame stands alone)."""
+    if stills:
+        tracker.reset()
+        frame_idx = 0
+    tracks = track_faces(det, tracker, gray, frame_idx)
+    refresh_identities(model, label_to_name, tracks, gray, frame_idx)
+    return tracks
+
+def draw_tracks(frame, tracks):
+    for t in tracks:
+        x, y, w, h = t.box
+        color = (0, 255, 0) if t.name != "Unknown" else (0, 0, 255)
+        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+        cv2.putText(frame, f"#{t.track_id} {t.name} | conf={t.conf:.1f}", (x, y-10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+def draw_stage_stats(frame, stats: Dict[str, StageStats], dropped: Dict[str, int]):
+    y = 25
+    for stage, st in stats.items():
+        mean_ms, p95_ms, rate = st.summary()
+        text = f"{stage}: {mean_ms:.1f} ms (p95 {p95_ms:.1f}) | {rate:.1f}/s"
+        cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+        y += 22
+    drops = " ".join(f"{k}={v}" for k, v in dropped.items())
+    cv2.putText(frame, f"dropped: {drops}", (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+
+def print_stage_stats(stats: Dict[str, StageStats], dropped: Dict[str, int]):
+    parts = []
+    for stage, st in stats.items():
+        mean_ms, p95_ms, rate = st.summary()
+        parts.append(f"{stage} {mean_ms:.1f}/{p95_ms:.1f} ms @ {rate:.1f}/s" if stage == "capture" else
+                     f"{stage} {mean_ms:.1f}/{p95_ms:.1f} ms")
+    drops = " ".join(f"{k}={v}" for k, v in dropped.items())
+    print(f"[RUN] {' | '.join(parts)} (mean/p95) | dropped: {drops}")
+
+def run_realtime(source=CAM_INDEX, headless: bool = False):
+    """
+    source: camera index, video file or image directory (see sources.open_source).
+    headless: no windows, progress printed instead; stops at the end of a file source.
+    """
+    recognizer = ModelWatcher()
 
     det = load_face_detector()
-    cap = cv2.VideoCapture(CAM_INDEX)
-    if not cap.isOpened():
-        raise RuntimeError("Webcam not accessible.")
+    cap = open_source(source)
 
+    tracker = FaceTracker()
+    frame_idx = 0
     fps = 0.0
     last = time.time()
+    start = last
 
-    print("[RUN] ESC to quit.")
+    print("[RUN] Ctrl+C to quit." if headless else "[RUN] ESC to quit.")
     while True:
         ok, frame = cap.read()
         if not ok:
-            continue
+            if cap.live:
+                continue
+            break
 
         t0 = time.time()
+        model, label_to_name = recognizer.get()
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        box = detect_largest_face(det, gray)
-
-        if box is not None:
-            x, y, w, h = box
-            face = crop_and_resize(gray, box)
-            pred, conf = model.predict(face)
-
-            name = "Unknown"
-            if conf <= CONF_THRESHOLD:
-                name = label_to_name.get(pred, "Unknown")
-
-            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-            cv2.putText(frame, f"{name} | conf={conf:.1f}", (x, y-10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        tracks = update_tracks(model, label_to_name, det, tracker, gray, frame_idx, stills=cap.stills)
+        frame_idx += 1
 
         now = time.time()
         dt = now - last
@@ -51,7 +164,13 @@ def run_realtime():
         last = now
         latency_ms = (time.time() - t0) * 1000.0
 
-        cv2.putText(frame, f"FPS: {fps:.1f} | latency: {latency_ms:.1f} ms", (10, 25),
+        if headless:
+            if frame_idx % 100 == 0:
+                print(f"[RUN] frames={frame_idx} | FPS: {fps:.1f} | latency: {latency_ms:.1f} ms | faces: {len(tracks)}")
+            continue
+
+        draw_tracks(frame, tracks)
+        cv2.putText(frame, f"FPS: {fps:.1f} | latency: {latency_ms:.1f} ms | faces: {len(tracks)}", (10, 25),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.75, (255, 255, 0), 2)
 
         cv2.imshow("Luna-City Face Recognition (LBPH)", frame)
@@ -59,7 +178,142 @@ def run_realtime():
             break
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not headless:
+        cv2.destroyAllWindows()
+    elapsed = time.time() - start
+    print(f"[RUN] {frame_idx} frames in {elapsed:.1f}s ({frame_idx / max(elapsed, 1e-9):.1f} FPS)")
+
+def run_realtime_threaded(source=CAM_INDEX, headless: bool = False):
+    """
+    Pipelined variant of run_realtime: capture, detection/tracking and LBPH
+    recognition run in their own threads (OpenCV releases the GIL), linked by
+    bounded drop-oldest queues, so a slow stage costs freshness, not FPS.
+    The capture thread keeps only the latest frame. Video files and image
+    directories use blocking queues instead: every frame is processed and a
+    headless run is reproducible. Display stays on the
+    main thread (HighGUI requirement) with per-stage latency overlays; in
+    headless mode the same statistics are printed every couple of seconds.
+    """
+    recognizer = ModelWatcher()
+
+    det = load_face_detector()
+    cap = open_source(source)
+
+    stop = threading.Event()
+    eof = threading.Event()
+    if cap.live:
+        latest = LatestFrame()
+        to_recognize = DropOldestQueue(PIPELINE_QUEUE_SIZE)
+        to_show = DropOldestQueue(PIPELINE_QUEUE_SIZE)
+    else:
+        # the capture thread waits until the detector took the previous frame
+        latest = BlockingQueue(1, stop)
+        to_recognize = BlockingQueue(PIPELINE_QUEUE_SIZE, stop)
+        to_show = BlockingQueue(PIPELINE_QUEUE_SIZE, stop)
+    stats = {stage: StageStats() for stage in ("capture", "detect", "recognize", "end-to-end")}
+    counts = {"read": 0, "shown": 0}
+
+    def capture():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            ok, frame = cap.read()
+            if not ok:
+                if cap.live:
+                    continue
+                eof.set()
+                break
+            t_cap = time.perf_counter()
+            stats["capture"].add((t_cap - t0) * 1000.0)
+            counts["read"] += 1
+            latest.put((t_cap, frame))
+
+    def detect():
+        tracker = FaceTracker()
+        frame_idx = 0
+        while not stop.is_set():
+            item = latest.get(timeout=0.1)
+            if item is None:
+                continue
+            t_cap, frame = item
+            t0 = time.perf_counter()
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if cap.stills:
+                tracker.reset()
+            tracks = track_faces(det, tracker, gray, 0 if cap.stills else frame_idx)
+            # the tracker keeps mutating its tracks: hand over copies
+            snapshot = [dataclasses.replace(t) for t in tracks]
+            stats["detect"].add((time.perf_counter() - t0) * 1000.0)
+            to_recognize.put((t_cap, frame_idx, frame, gray, snapshot))
+            frame_idx += 1
+
+    def recognize_worker():
+        # identities live here, keyed by track id, since the snapshots are throwaway copies
+        identities = {}
+        while not stop.is_set():
+            item = to_recognize.get(timeout=0.1)
+            if item is None:
+                continue
+            t_cap, frame_idx, frame, gray, tracks = item
+            t0 = time.perf_counter()
+            model, label_to_name = recognizer.get()
+            for t in tracks:
+                if t.track_id in identities:
+                    t.name, t.conf, t.recognized_at = identities[t.track_id]
+            refresh_identities(model, label_to_name, tracks, gray, 0 if cap.stills else frame_idx)
+            identities = {t.track_id: (t.name, t.conf, t.recognized_at) for t in tracks}
+            stats["recognize"].add((time.perf_counter() - t0) * 1000.0)
+            to_show.put((t_cap, frame, tracks))
+
+    workers = [threading.Thread(target=fn, name=fn.__name__, daemon=True)
+               for fn in (capture, detect, recognize_worker)]
+    for w in workers:
+        w.start()
+
+    print("[RUN] threaded pipeline | " + ("Ctrl+C to quit." if headless else "ESC to quit."))
+    last_report = time.perf_counter()
+    try:
+        while True:
+            item = to_show.get(timeout=0.5)
+            if item is None:
+                # a file source drops nothing: done once every frame read came out
+                if eof.is_set() and counts["shown"] >= counts["read"]:
+                    break
+            else:
+                t_cap, frame, tracks = item
+                counts["shown"] += 1
+                stats["end-to-end"].add((time.perf_counter() - t_cap) * 1000.0)
+            dropped = {"capture": latest.dropped, "recognize": to_recognize.dropped, "display": to_show.dropped}
+
+            if headless:
+                if time.perf_counter() - last_report >= 2.0:
+                    print_stage_stats(stats, dropped)
+                    last_report = time.perf_counter()
+                continue
+            if item is not None:
+                draw_tracks(frame, tracks)
+                draw_stage_stats(frame, stats, dropped)
+                cv2.imshow("Luna-City Face Recognition (LBPH)", frame)
+            if (cv2.waitKey(1) & 0xFF) == 27:
+                break
+    finally:
+        stop.set()
+        for w in workers:
+            w.join(timeout=1.0)
+        cap.release()
+        if not headless:
+            cv2.destroyAllWindows()
+    print_stage_stats(stats, {"capture": latest.dropped, "recognize": to_recognize.dropped,
+                              "display": to_show.dropped})
 
 if __name__ == "__main__":
-    run_realtime()
+    ap = argparse.ArgumentParser(description="Realtime face recognition (LBPH).")
+    ap.add_argument("--threaded", action="store_true",
+                    help="pipelined capture/detect/recognize threads with bounded queues")
+    ap.add_argument("--source", default=CAM_INDEX,
+                    help="camera index, video file or image directory (default: webcam)")
+    ap.add_argument("--headless", action="store_true", help="no windows, print statistics instead")
+    args = ap.parse_args()
+    if args.threaded:
+        run_realtime_threaded(args.source, headless=args.headless)
+    else:
+        run_realtime(args.source, headless=args.headless)
@@ -0,0 +1,115 @@
+"""
+Batch recognition: many face crops at once (recorded footage, multi-face
+frames) through the NumPy LBP index, optionally spread over processes.
+
+    python recognition.py faces_db --workers 2
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import MODEL_PATH, LABELS_PATH, CONF_THRESHOLD, FACE_SIZE
+from lbp import LBPIndex
+from gallery import load_gallery, gallery_is_current
+
+BATCH_CHUNK = 256   # faces per task sent to a worker process
+
+_worker_index: Optional[LBPIndex] = None
+
+def load_index(prune: Optional[int] = None) -> LBPIndex:
+    """LBPIndex over the trained model: the binary gallery if current, else MODEL_PATH + LABELS_PATH."""
+    if gallery_is_current():
+        return load_gallery(prune=prune)
+    if not hasattr(cv2, "face"):
+        raise RuntimeError("cv2.face not found. Install opencv-contrib-python.")
+    label_to_name = np.load(LABELS_PATH, allow_pickle=True).item()
+    model = cv2.face.LBPHFaceRecognizer_create()
+    model.read(MODEL_PATH)
+    return LBPIndex.from_model(model, label_to_name, prune=prune)
+
+def _init_worker(prune: Optional[int], gallery=None):
+    # each worker gets the index once, not with every task: the caller's
+    # (bins, labels, sums, names) when given, else it loads the model itself
+    global _worker_index
+    if gallery is None:
+        _worker_index = load_index(prune)
+    else:
+        bins, labels, sums, label_to_name = gallery
+        _worker_index = LBPIndex(bins, labels, label_to_name, prune=prune, bin_major=True, sums=sums)
+
+def _predict_chunk(faces):
+    return _worker_index.predict_many(faces)
+
+def recognize_batch(faces, index: Optional[LBPIndex] = None, workers: int = 1,
+                    chunk: int = BATCH_CHUNK) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    faces: (N, 160, 160) uint8 crops (a single 2D crop is accepted too).
+    Returns labels (int32, nearest neighbour), names (object, "Unknown" above
+    CONF_THRESHOLD as in realtime.recognize) and confidences (float32).
+    With workers > 1 the stack is split into chunks predicted in a process
+    pool; each worker receives `index` once, or loads the model from disk
+    itself when index is None.
+    """
+    faces = np.asarray(faces, dtype=np.uint8)
+    if faces.ndim == 2:
+        faces = faces[None]
+    if faces.shape[1:] != (FACE_SIZE[1], FACE_SIZE[0]):
+        raise ValueError(f"expected (N, {FACE_SIZE[1]}, {FACE_SIZE[0]}) crops, got {faces.shape}")
+
+    if workers > 1 and len(faces) > chunk:
+        if index is None:
+            initargs = (None,)
+        else:
+            initargs = (index.prune, (index.bins, index.labels, index.sums, index.label_to_name))
+        parts = [faces[s:s + chunk] for s in range(0, len(faces), chunk)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            results = list(pool.map(_predict_chunk, parts))
+        labels = np.concatenate([r[0] for r in results])
+        confs = np.concatenate([r[1] for r in results])
+        label_to_name = index.label_to_name if index is not None else \
+            np.load(LABELS_PATH, allow_pickle=True).item()
+    else:
+        index = index or load_index()
+        labels, confs = index.predict_many(faces)
+        label_to_name = index.label_to_name
+
+    names = np.array([label_to_name.get(int(l), "Unknown") if c <= CONF_THRESHOLD else "Unknown"
+                      for l, c in zip(labels, confs)], dtype=object)
+    return labels, names, confs
+
+def load_crops(root: str):
+    """All images under root as FACE_SIZE gray crops, with their paths."""
+    paths, crops = [], []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            if fn.lower().endswith((".png", ".jpg", ".jpeg")):
+                img = cv2.imread(os.path.join(dirpath, fn), cv2.IMREAD_GRAYSCALE)
+                if img is None:
+                    continue
+                if img.shape[::-1] != tuple(FACE_SIZE):
+                    img = cv2.resize(img, FACE_SIZE, interpolation=cv2.INTER_AREA)
+                paths.append(os.path.join(dirpath, fn))
+                crops.append(img)
+    return paths, np.stack(crops) if crops else np.zeros((0, FACE_SIZE[1], FACE_SIZE[0]), np.uint8)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Recognize a directory of face crops in batch.")
+    ap.add_argument("root", help="directory of face crops (e.g. faces_db)")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--prune", type=int, default=None, help="people kept by centroid pruning")
+    args = ap.parse_args()
+
+    paths, crops = load_crops(args.root)
+    index = load_index(args.prune)
+    t0 = time.perf_counter()
+    labels, names, confs = recognize_batch(crops, index, workers=args.workers)
+    dt = time.perf_counter() - t0
+    for path, name, conf in zip(paths, names, confs):
+        print(f"{path}: {name} | conf={conf:.1f}")
+    print(f"[BATCH] {len(crops)} faces in {dt:.2f}s ({len(crops) / max(dt, 1e-9):.1f} faces/s)")
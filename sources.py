@@ -0,0 +1,82 @@
+"""
+Frame sources for realtime/enroll/bench: the webcam, a video file or a
+directory of images, all behind the cv2.VideoCapture read() interface.
+"""
+import os
+from typing import List, Optional, Tuple, Union
+
+import cv2
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+
+
+class ImageDirSource:
+    """
+    Replays the images under a directory (sorted, recursively) as frames.
+    For a faces_db-style tree (<dir>/<person>/*.png) `label` is the person
+    of the frame last returned, so results can be scored against it.
+    """
+
+    live = False
+    stills = True       # frames are unrelated: nothing to track between them
+
+    def __init__(self, root: str):
+        self.root = root
+        self.paths: List[str] = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            self.paths += [os.path.join(dirpath, fn) for fn in sorted(filenames)
+                           if fn.lower().endswith(IMAGE_EXTS)]
+        self._next = 0
+        self.label: Optional[str] = None
+
+    def isOpened(self) -> bool:
+        return len(self.paths) > 0
+
+    def read(self) -> Tuple[bool, Optional[object]]:
+        while self._next < len(self.paths):
+            path = self.paths[self._next]
+            self._next += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            rel = os.path.relpath(path, self.root)
+            self.label = rel.split(os.sep)[0] if os.sep in rel else None
+            return True, frame
+        return False, None
+
+    def release(self):
+        self._next = len(self.paths)
+
+
+class VideoSource:
+    """cv2.VideoCapture plus a `live` flag (webcam) and an optional fixed label for scoring."""
+
+    stills = False
+
+    def __init__(self, spec: Union[int, str], label: Optional[str] = None):
+        self.live = isinstance(spec, int)
+        self.cap = cv2.VideoCapture(spec)
+        self.label = label
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+def open_source(spec: Union[int, str], label: Optional[str] = None):
+    """Camera index (int or digit string), video file or image directory."""
+    if isinstance(spec, str) and spec.isdigit():
+        spec = int(spec)
+    if isinstance(spec, str) and os.path.isdir(spec):
+        src = ImageDirSource(spec)
+    else:
+        src = VideoSource(spec, label=label)
+    if not src.isOpened():
+        raise RuntimeError("Webcam not accessible." if isinstance(spec, int) else f"Cannot open source: {spec}")
+    return src
@@ -1,20 +1,88 @@
 from __future__ import annotations
+import heapq
+import os
 import random
-from typing import Dict, List, Optional, Set, Tuple
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+from plotting import new_figure, finish_figure
 
 
 Node = int
 Color = str
 
 
+# ---------------------------
+# CSR adjacency (large maps)
+# ---------------------------
+
+@dataclass
+class CSRGraph:
+    """
+    Compressed sparse row adjacency for nodes 0..n-1: the neighbors of v are
+    neighbors[offsets[v]:offsets[v+1]], sorted, each edge stored in both rows.
+    Much smaller than Dict[int, Set[int]] and built without Python loops.
+    """
+    offsets: np.ndarray     # int64, length n + 1
+    neighbors: np.ndarray   # int32, length 2 * edges
+
+    @property
+    def n(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, v: Node) -> np.ndarray:
+        return self.neighbors[self.offsets[v]:self.offsets[v + 1]]
+
+    def keys(self) -> range:
+        return range(self.n)
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def neighbor_lists(self) -> List[List[int]]:
+        """Plain Python lists per node (what the bitset solver iterates)."""
+        nb, off = self.neighbors.tolist(), self.offsets.tolist()
+        return [nb[off[v]:off[v + 1]] for v in range(self.n)]
+
+    def to_dict(self) -> Dict[Node, Set[Node]]:
+        return {v: set(nbs) for v, nbs in enumerate(self.neighbor_lists())}
+
+    @classmethod
+    def from_edges(cls, n: int, src: np.ndarray, dst: np.ndarray) -> "CSRGraph":
+        """Build from undirected edges given once each as (src[i], dst[i])."""
+        rows = np.concatenate([src, dst])
+        cols = np.concatenate([dst, src])
+        order = np.lexsort((cols, rows))
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+        return cls(offsets=offsets, neighbors=cols[order].astype(np.int32))
+
+    @classmethod
+    def from_dict(cls, adj: Dict[Node, Set[Node]]) -> "CSRGraph":
+        """Nodes must be 0..n-1."""
+        edges = [(u, v) for u, nbs in adj.items() for v in nbs if u < v]
+        e = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        return cls.from_edges(len(adj), e[:, 0], e[:, 1])
+
+
+Graph = Union[Dict[Node, Set[Node]], CSRGraph]
+
+
 # ---------------------------
 # Utility / Validation
 # ---------------------------
 
-def is_valid_coloring(adj: Dict[Node, Set[Node]], assignment: Dict[Node, Color]) -> bool:
+def is_valid_coloring(adj: Graph, assignment: Dict[Node, Color]) -> bool:
+    if isinstance(adj, CSRGraph):
+        ok, _ = coloring_conflicts(coloring_to_array(assignment, adj.n), *edge_arrays(adj))
+        return ok
+
     for u, nbs in adj.items():
         if u not in assignment:
             continue
@@ -24,10 +92,56 @@ def is_valid_coloring(adj: Dict[Node, Set[Node]], assignment: Dict[Node, Color])
     return True
 
 
-def count_edges(adj: Dict[Node, Set[Node]]) -> int:
+def count_edges(adj: Graph) -> int:
+    if isinstance(adj, CSRGraph):
+        return len(adj.neighbors) // 2
     return sum(len(nbs) for nbs in adj.values()) // 2
 
 
+def edge_arrays(adj: Graph) -> Tuple[np.ndarray, np.ndarray]:
+    """Every undirected edge once, as index arrays src < dst (nodes must be 0..n-1)."""
+    if isinstance(adj, CSRGraph):
+        src = np.repeat(np.arange(adj.n, dtype=np.int64), adj.degrees())
+        dst = adj.neighbors.astype(np.int64)
+    else:
+        src = np.fromiter((u for u, nbs in adj.items() for v in nbs), dtype=np.int64)
+        dst = np.fromiter((v for nbs in adj.values() for v in nbs), dtype=np.int64)
+    keep = src < dst
+    return src[keep], dst[keep]
+
+
+def coloring_to_array(assignment: Dict[Node, Color], n: int,
+                      colors: Optional[List[Color]] = None) -> np.ndarray:
+    """
+    Assignment as an int array over nodes 0..n-1: index into `colors`
+    (default: sorted distinct colors used), -1 for unassigned nodes.
+    """
+    if colors is None:
+        colors = sorted({c for v, c in assignment.items() if not isinstance(v, str)})
+    ids = {c: i for i, c in enumerate(colors)}
+    return np.fromiter((ids[assignment[v]] if v in assignment else -1 for v in range(n)),
+                       dtype=np.int64, count=n)
+
+
+def coloring_conflicts(color_ids: np.ndarray, src: np.ndarray, dst: np.ndarray) -> Tuple[bool, np.ndarray]:
+    """
+    Vectorized check of a coloring given as an int array (-1 = unassigned) and
+    edges as two index arrays. Returns (valid, conflicts per node), where a
+    node's count is the number of its neighbors sharing its color.
+    """
+    a = color_ids[src]
+    bad = (a >= 0) & (a == color_ids[dst])
+    n = len(color_ids)
+    counts = np.bincount(src[bad], minlength=n) + np.bincount(dst[bad], minlength=n)
+    return not bad.any(), counts
+
+
+def pop_stats(sol: Dict) -> Dict[str, int]:
+    """Remove the _stats_* counters the solvers attach to a solution and return them."""
+    keys = [k for k in sol if isinstance(k, str) and k.startswith("_stats_")]
+    return {k[len("_stats_"):]: sol.pop(k) for k in keys}
+
+
 # ---------------------------
 # Random "map" generator (graph) °❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･°❀⋆.ೃ࿔*:･
 # ---------------------------
@@ -47,6 +161,40 @@ def generate_random_graph(n: int, p: float, seed: int) -> Dict[Node, Set[Node]]:
     return adj
 
 
+def generate_random_graph_csr(n: int, p: float, seed: int) -> CSRGraph:
+    """
+    Same G(n, p) model as generate_random_graph, sampled in bulk with NumPy
+    (different random stream, so not the same graph for a given seed).
+    The n*(n-1)/2 node pairs are numbered row by row; the gaps between chosen
+    pairs are Geometric(p), so the cost is O(edges) rather than O(n^2).
+    """
+    rng = np.random.default_rng(seed)
+    total = n * (n - 1) // 2
+    if total == 0 or p <= 0:
+        return CSRGraph.from_edges(n, np.empty(0, np.int64), np.empty(0, np.int64))
+
+    if p >= 1:
+        k = np.arange(total, dtype=np.int64)
+    else:
+        chunks = []
+        last = -1
+        batch = int(total * p + 4 * np.sqrt(total * p) + 16)
+        while last < total:
+            k = last + np.cumsum(rng.geometric(p, size=batch), dtype=np.int64)
+            chunks.append(k[k < total])
+            last = int(k[-1])
+        k = np.concatenate(chunks)
+
+    # pair index -> (i, j): row i starts at i*(2n - i - 1)/2; the float estimate
+    # can be one row off near boundaries, so fix it up with exact integers
+    row_start = lambda r: r * (2 * n - r - 1) // 2
+    i = (n - 2 - np.floor(np.sqrt(4.0 * n * (n - 1) - 8.0 * k - 7) / 2 - 0.5)).astype(np.int64)
+    i += (row_start(i + 1) <= k).astype(np.int64)
+    i -= (row_start(i) > k).astype(np.int64)
+    j = k - row_start(i) + i + 1
+    return CSRGraph.from_edges(n, i, j)
+
+
 # ---------------------------
 # CSP Solver (Backtracking + Domain Reduction)
 # ---------------------------
@@ -81,7 +229,8 @@ def order_values_lcv(adj: Dict[Node, Set[Node]],
                 eliminated += 1
         return eliminated
 
-    return sorted(domains[var], key=impact)
+    # sorted() first so ties are broken by color name, not set iteration order
+    return sorted(sorted(domains[var]), key=impact)
 
 
 def forward_check(adj: Dict[Node, Set[Node]],
@@ -110,25 +259,71 @@ def forward_check(adj: Dict[Node, Set[Node]],
     return True, new_domains
 
 
-def solve_map_coloring(adj: Dict[Node, Set[Node]], colors: List[Color], seed: int = 0) -> Optional[Dict[Node, Color]]:
+def ac3(adj: Dict[Node, Set[Node]],
+        queue: List[Node],
+        domains: Dict[Node, Set[Color]],
+        assignment: Dict[Node, Color],
+        stats: Dict[str, int]) -> bool:
+    """
+    AC-3 propagation (in place) for the != constraints.
+    Arc (nb -> v) can only remove a value when v's domain is a single color,
+    so the queue holds nodes whose domain became a singleton and each pop
+    revises the arcs from their unassigned neighbors.
+    Returns False on a domain wipe-out.
+    """
+    while queue:
+        v = queue.pop()
+        (color,) = domains[v]
+        for nb in adj[v]:
+            if nb in assignment:
+                continue
+            stats["revisions"] += 1
+            if color in domains[nb]:
+                domains[nb].remove(color)
+                stats["prunes"] += 1
+                if len(domains[nb]) == 0:
+                    return False
+                if len(domains[nb]) == 1:
+                    queue.append(nb)
+    return True
+
+
+PROPAGATION_MODES = ("fc", "mac")
+
+
+def solve_map_coloring(adj: Graph, colors: List[Color], seed: int = 0,
+                       propagation: str = "fc") -> Optional[Dict[Node, Color]]:
     """
     Backtracking CSP solver with:
     - MRV variable selection
-    - forward checking (domain reduction)
+    - forward checking (domain reduction), or with propagation="mac"
+      maintaining arc consistency (AC-3 after every assignment)
     - optional LCV ordering
     """
+    if propagation not in PROPAGATION_MODES:
+        raise ValueError(f"propagation must be one of {PROPAGATION_MODES}, got {propagation!r}")
+    mac = propagation == "mac"
+    if isinstance(adj, CSRGraph):
+        adj = adj.to_dict()
+
     rng = random.Random(seed)
     domains: Dict[Node, Set[Color]] = {v: set(colors) for v in adj}
     assignment: Dict[Node, Color] = {}
 
     # simple counters (for report)
-    stats = {"calls": 0, "fails": 0}
+    stats = {"calls": 0, "fails": 0, "revisions": 0, "prunes": 0}
 
-    def backtrack(domains: Dict[Node, Set[Color]]) -> Optional[Dict[Node, Color]]:
+    # Explicit stack instead of recursion (one frame per assigned node would hit
+    # Python's recursion limit on maps with ~1000+ districts).
+    # frame = (var, remaining values, domains the values were ordered against)
+    stack: List[Tuple[Node, Iterator[Color], Dict[Node, Set[Color]]]] = []
+
+    def expand(domains: Dict[Node, Set[Color]]) -> bool:
+        """One 'backtrack call': True if complete, else push a frame for the next var."""
         stats["calls"] += 1
 
         if len(assignment) == len(adj):
-            return dict(assignment)
+            return True
 
         var = select_unassigned_var(adj, domains, assignment)
         values = order_values_lcv(adj, var, domains, assignment)
@@ -136,6 +331,15 @@ def solve_map_coloring(adj: Dict[Node, Set[Node]], colors: List[Color], seed: in
         # (Tiny randomness can prevent worst-case loops, but keep it simple)
         # rng.shuffle(values)
 
+        stack.append((var, iter(values), domains))
+        return False
+
+    if mac and not ac3(adj, [v for v in adj if len(domains[v]) == 1], domains, assignment, stats):
+        return None
+
+    solved = expand(domains)
+    while stack and not solved:
+        var, values, domains = stack[-1]
         for color in values:
             # local consistency check
             if any(assignment.get(nb) == color for nb in adj[var]):
@@ -146,19 +350,900 @@ def solve_map_coloring(adj: Dict[Node, Set[Node]], colors: List[Color], seed: in
                 continue
 
             assignment[var] = color
-            res = backtrack(new_domains)
-            if res is not None:
-                return res
-            del assignment[var]
+            if mac:
+                queue = [nb for nb in adj[var] if nb not in assignment and len(new_domains[nb]) == 1]
+                if not ac3(adj, queue, new_domains, assignment, stats):
+                    del assignment[var]
+                    continue
+
+            solved = expand(new_domains)
+            break
+        else:
+            # dead-end: drop this frame and un-assign the parent's current value
+            stats["fails"] += 1
+            stack.pop()
+            if stack:
+                del assignment[stack[-1][0]]
 
+    if not solved:
+        return None
+    sol = dict(assignment)
+    # attach stats to solution for printing
+    for key, value in stats.items():
+        sol[f"_stats_{key}"] = value
+    return sol
+
+
+# ---------------------------
+# Bitset CSP Solver (flat arrays + trail, same heuristics as above)
+# ---------------------------
+
+def _index_graph(adj: Graph) -> Tuple[List[Node], List[List[int]]]:
+    """Node list and neighbor lists renumbered to 0..n-1 (in adj's key order)."""
+    if isinstance(adj, CSRGraph):
+        return list(range(adj.n)), adj.neighbor_lists()
+    nodes = list(adj.keys())
+    index = {v: i for i, v in enumerate(nodes)}
+    return nodes, [[index[u] for u in adj[v]] for v in nodes]
+
+
+class _BitsetCSP:
+    """
+    Flat-array state for the bitset solver.
+    Nodes are renumbered 0..n-1 and dom[i] is an int bitmask: bit c set means
+    colors[c] is still allowed. Every domain change is pushed on a trail as
+    (node, old_mask), so a failed branch is undone in place instead of copying
+    all domains like forward_check() does.
+
+    MRV and LCV data are kept up to date on every domain change and undo:
+    - heaps[s] holds the ranks of unassigned nodes with s colors left, where
+      rank orders nodes by (-degree, index); stale entries are dropped lazily.
+    - support[i*k + c] counts the unassigned neighbors of i that still allow c.
+    """
+
+    def __init__(self, adj: Graph, colors: List[Color]):
+        self.nodes, self.nbrs = _index_graph(adj)
+        self.degree: List[int] = [len(nb) for nb in self.nbrs]
+
+        # bit order = color name order, so LCV ties match order_values_lcv()
+        self.colors: List[Color] = sorted(set(colors))
+        k = self.k = len(self.colors)
+        self.popcount: List[int] = [bin(m).count("1") for m in range(1 << k)]
+
+        n = len(self.nodes)
+        self.dom: List[int] = [(1 << k) - 1] * n
+        self.color: List[int] = [-1] * n      # assigned color bit, -1 = unassigned
+        self.level: List[int] = [-1] * n      # search depth at which a node was assigned
+        self.at_level: List[int] = []         # inverse of level for assigned nodes
+        self.trail: List[Tuple[int, int]] = []
+        self.n_assigned = 0
+        self.wiped = -1                       # node whose domain emptied in the last assign()
+        self.stats: Dict[str, int] = {"calls": 0, "fails": 0, "revisions": 0, "prunes": 0,
+                                      "backjumps": 0, "nogoods": 0, "restarts": 0}
+
+        # learned nogoods: tuples of (node, color) that cannot all hold at once
+        self.nogoods: List[Tuple[Tuple[int, int], ...]] = []
+        self.nogood_index: Dict[Tuple[int, int], List[int]] = {}
+
+        self.support: List[int] = [d for d in self.degree for _ in range(k)]
+        self.rank_node: List[int] = sorted(range(n), key=lambda i: (-self.degree[i], i))
+        self.rank: List[int] = [0] * n
+        for r, i in enumerate(self.rank_node):
+            self.rank[i] = r
+        self._rebuild_heaps()
+
+    def _rebuild_heaps(self) -> None:
+        pc, dom, color = self.popcount, self.dom, self.color
+        self.heaps: List[List[int]] = [[] for _ in range(self.k + 1)]
+        for r, i in enumerate(self.rank_node):     # rank order -> lists are already heaps
+            if color[i] < 0:
+                self.heaps[pc[dom[i]]].append(r)
+        self.pushes = 0
+
+    def _requeue(self, i: int) -> None:
+        heapq.heappush(self.heaps[self.popcount[self.dom[i]]], self.rank[i])
+        self.pushes += 1
+
+    def _adjust_support(self, i: int, bits: int, delta: int) -> None:
+        """Node i starts (+1) or stops (-1) allowing `bits` for all of its neighbors."""
+        k, support, nbrs = self.k, self.support, self.nbrs[i]
+        c = 0
+        while bits:
+            if bits & 1:
+                for w in nbrs:
+                    support[w * k + c] += delta
+            bits >>= 1
+            c += 1
+
+    def select_var(self) -> int:
+        """MRV: smallest bucket, ties -> higher degree, then lower index."""
+        if self.pushes > 4 * len(self.dom) + 64:
+            self._rebuild_heaps()
+        pc, dom, color, rank_node = self.popcount, self.dom, self.color, self.rank_node
+        for s, heap in enumerate(self.heaps):
+            while heap:
+                i = rank_node[heap[0]]
+                if color[i] < 0 and pc[dom[i]] == s:
+                    return i
+                heapq.heappop(heap)
+        return -1
+
+    def order_values(self, var: int, rng: Optional[random.Random] = None, lcv: bool = True) -> List[int]:
+        """
+        LCV from the cached support counts: fewest neighbors eliminated first.
+        With rng, ties are broken randomly instead of by color order;
+        lcv=False drops the LCV key (plain color order, or random with rng).
+        """
+        k, support, mask = self.k, self.support, self.dom[var]
+        base = var * k
+        values = [c for c in range(k) if mask >> c & 1]
+        if rng is not None:
+            rng.shuffle(values)
+        if lcv:
+            values.sort(key=lambda c: support[base + c])    # stable: keeps tie order
+        return values
+
+    def _remove(self, i: int, bit: int) -> bool:
+        """Drop color bit from unassigned node i. False if the domain is wiped out."""
+        dom = self.dom
+        self.trail.append((i, dom[i]))
+        dom[i] &= ~bit
+        self._adjust_support(i, bit, -1)
+        if dom[i] == 0:
+            return False
+        self._requeue(i)
+        return True
+
+    def assign(self, var: int, c: int) -> bool:
+        """
+        Assign var=c and forward check, recording changes on the trail.
+        On failure the caller undoes back to its trail mark.
+        """
+        bit = 1 << c
+        dom, color = self.dom, self.color
+        self.trail.append((var, dom[var]))
+        self._adjust_support(var, dom[var], -1)
+        dom[var] = bit
+        color[var] = c
+        self.level[var] = self.n_assigned
+        self.at_level.append(var)
+        self.n_assigned += 1
+
+        for nb in self.nbrs[var]:
+            if color[nb] >= 0:
+                if color[nb] == c:
+                    return False
+            elif dom[nb] & bit:
+                if not self._remove(nb, bit):
+                    self.wiped = nb
+                    return False
+        return True
+
+    def propagate(self, queue: List[int]) -> bool:
+        """AC-3 on the bitmasks, same singleton-queue scheme as ac3()."""
+        dom, color, pc, stats = self.dom, self.color, self.popcount, self.stats
+        while queue:
+            i = queue.pop()
+            bit = dom[i]
+            for nb in self.nbrs[i]:
+                if color[nb] >= 0:
+                    continue
+                stats["revisions"] += 1
+                if dom[nb] & bit:
+                    stats["prunes"] += 1
+                    if not self._remove(nb, bit):
+                        return False
+                    if pc[dom[nb]] == 1:
+                        queue.append(nb)
+        return True
+
+    def singletons(self, nodes) -> List[int]:
+        """Unassigned nodes among `nodes` whose domain has a single color left."""
+        dom, color, pc = self.dom, self.color, self.popcount
+        return [i for i in nodes if color[i] < 0 and pc[dom[i]] == 1]
+
+    def explain(self, i: int) -> Set[int]:
+        """
+        Levels of assigned neighbors that account for the colors missing from
+        dom[i] (forward checking only removes a color because an assigned
+        neighbor has it). Per color the shallowest such neighbor is used.
+        """
+        dom, color, level = self.dom[i], self.color, self.level
+        best: Dict[int, int] = {}
+        for w in self.nbrs[i]:
+            c = color[w]
+            if c >= 0 and not dom >> c & 1:
+                if c not in best or level[w] < best[c]:
+                    best[c] = level[w]
+        return set(best.values())
+
+    def nogood_clash(self, var: int, c: int) -> Optional[List[int]]:
+        """Other nodes of a learned nogood that var=c would complete, or None."""
+        color = self.color
+        for ng_id in self.nogood_index.get((var, c), ()):
+            ng = self.nogoods[ng_id]
+            if all(color[u] == cu for u, cu in ng if u != var):
+                return [u for u, _ in ng if u != var]
+        return None
+
+    def learn(self, levels: Set[int], limit: int) -> None:
+        """Record the assignments at `levels` as a nogood (bounded count and size)."""
+        if len(self.nogoods) >= limit or len(levels) > NOGOOD_MAX_SIZE:
+            return
+        ng = tuple((self.at_level[l], self.color[self.at_level[l]]) for l in sorted(levels))
+        for pair in ng:
+            self.nogood_index.setdefault(pair, []).append(len(self.nogoods))
+        self.nogoods.append(ng)
+        self.stats["nogoods"] += 1
+
+    def undo(self, mark: int, var: int) -> None:
+        """Roll the trail back to mark (var's own entry from assign()) and unassign var."""
+        dom, trail = self.dom, self.trail
+        while len(trail) > mark + 1:
+            i, old = trail.pop()
+            self._adjust_support(i, old & ~dom[i], +1)
+            dom[i] = old
+            self._requeue(i)
+
+        _, old = trail.pop()
+        dom[var] = old
+        self.color[var] = -1
+        self.level[var] = -1
+        self.at_level.pop()
+        self.n_assigned -= 1
+        self._adjust_support(var, old, +1)
+        self._requeue(var)
+
+    def assignment(self) -> Dict[Node, Color]:
+        return {self.nodes[i]: self.colors[c] for i, c in enumerate(self.color)}
+
+
+# search outcomes besides a depth to resume at (-1 = unsolvable)
+_SOLVED = -2
+_RESTART = -3
+
+NOGOOD_MAX_SIZE = 8          # longer conflict sets are not worth storing
+RESTART_BASE_FAILS = 100     # dead-ends allowed in the first run
+RESTART_GROWTH = 1.5         # cutoff multiplier per restart
+
+
+def solve_map_coloring_bitset(adj: Graph, colors: List[Color], seed: int = 0,
+                              propagation: str = "fc",
+                              backjumping: bool = False,
+                              nogoods: int = 0,
+                              restarts: int = 0,
+                              lcv: bool = True) -> Optional[Dict[Node, Color]]:
+    """
+    Same search as solve_map_coloring (MRV + degree tie-break, LCV, forward checking
+    or MAC), but domains are bitmasks in a flat list and backtracking undoes a trail
+    instead of copying every domain, so one node expansion costs O(degree) instead
+    of O(n*k). Returns the same assignment and _stats_* counters.
+
+    Options for hard instances (all off by default):
+    - backjumping: conflict-directed backjumping (FC-CBJ); needs propagation="fc"
+    - nogoods: keep up to this many learned nogoods (conflict sets of at most
+      NOGOOD_MAX_SIZE assignments); needs backjumping
+    - restarts: restart up to this many times after a growing number of dead-ends,
+      with LCV ties broken randomly via `seed`; nogoods survive restarts
+    - lcv=False tries colors in plain order instead of least-constraining first
+    """
+    if propagation not in PROPAGATION_MODES:
+        raise ValueError(f"propagation must be one of {PROPAGATION_MODES}, got {propagation!r}")
+    if backjumping and propagation != "fc":
+        raise ValueError("backjumping needs propagation='fc'")
+    if nogoods and not backjumping:
+        raise ValueError("nogood recording needs backjumping=True")
+    mac = propagation == "mac"
+
+    csp = _BitsetCSP(adj, colors)
+    n = len(csp.nodes)
+    stats = csp.stats
+    rng = random.Random(seed) if restarts else None
+    conf: List[Set[int]] = []     # conflict set (levels) of the variable at each depth
+    cutoff = float("inf")         # dead-end count at which the current run restarts
+
+    # Explicit stack, one frame per depth: [var, remaining values, trail mark of
+    # var's current value]. Recursion would hit the interpreter limit on big maps.
+    frames: List[list] = []
+
+    def expand() -> bool:
+        """One 'backtrack call': True if complete, else push a frame for the next var."""
+        stats["calls"] += 1
+
+        if csp.n_assigned == n:
+            return True
+
+        var = csp.select_var()
+        frames.append([var, iter(csp.order_values(var, rng, lcv)), -1])
+        conf.append(set())
+        return False
+
+    def dead_end() -> int:
+        """Current frame ran out of values: pop it, return the depth to resume at."""
+        depth = len(frames) - 1
+        var = frames.pop()[0]
         stats["fails"] += 1
+        total = conf.pop()
+        if stats["fails"] >= cutoff:
+            return _RESTART
+        if not backjumping:
+            return depth - 1
+
+        total |= csp.explain(var)
+        if nogoods:
+            csp.learn(total, nogoods)
+        if not total:
+            return -1                 # no assignment to blame: unsolvable
+        h = max(total)
+        conf[h] |= total - {h}
+        if h < depth - 1:
+            stats["backjumps"] += 1
+        return h
+
+    def search() -> int:
+        if expand():
+            return _SOLVED
+        while frames:
+            frame = frames[-1]
+            var, values = frame[0], frame[1]
+            depth = len(frames) - 1
+            for c in values:
+                if nogoods:
+                    clash = csp.nogood_clash(var, c)
+                    if clash is not None:
+                        conf[depth].update(csp.level[u] for u in clash)
+                        continue
+
+                mark = len(csp.trail)
+                if csp.assign(var, c) and (not mac or csp.propagate(csp.singletons(csp.nbrs[var]))):
+                    frame[2] = mark
+                    break
+                if backjumping and csp.wiped >= 0:
+                    conf[depth].update(csp.explain(csp.wiped))
+                    conf[depth].discard(depth)
+                csp.wiped = -1
+                csp.undo(mark, var)
+            else:
+                target = dead_end()
+                # unwind every frame deeper than target (all of them on restart or
+                # when unsolvable), then retract the value tried at target itself
+                while frames and (target < 0 or len(frames) > target + 1):
+                    var, _, mark = frames.pop()
+                    csp.undo(mark, var)
+                    conf.pop()
+                if target < 0:
+                    return target
+                var, _, mark = frames[-1]
+                csp.undo(mark, var)
+                continue
+
+            if expand():
+                return _SOLVED
+        return -1
+
+    if mac and not csp.propagate(csp.singletons(range(n))):
         return None
+    for run in range(restarts + 1):
+        if run < restarts:
+            cutoff = stats["fails"] + RESTART_BASE_FAILS * RESTART_GROWTH ** run
+        else:
+            cutoff = float("inf")
+        res = search()
+        if res != _RESTART:
+            break
+        stats["restarts"] += 1
+    if res != _SOLVED:
+        return None
+    sol = csp.assignment()
+    for key, value in stats.items():
+        sol[f"_stats_{key}"] = value
+    return sol
 
-    sol = backtrack(domains)
-    # attach stats to solution for printing
+
+# ---------------------------
+# Graph decomposition (solve independent parts separately)
+# ---------------------------
+
+def connected_components(adj: Dict[Node, Set[Node]]) -> List[List[Node]]:
+    """Connected components as node lists, each in adj's key order."""
+    seen: Set[Node] = set()
+    comps = []
+    for root in adj:
+        if root in seen:
+            continue
+        seen.add(root)
+        comp, queue = [], [root]
+        while queue:
+            u = queue.pop()
+            comp.append(u)
+            for w in adj[u]:
+                if w not in seen:
+                    seen.add(w)
+                    queue.append(w)
+        comps.append(comp)
+
+    order = {v: i for i, v in enumerate(adj)}
+    return [sorted(c, key=order.__getitem__) for c in comps]
+
+
+def biconnected_components(adj: Dict[Node, Set[Node]]) -> List[List[Node]]:
+    """
+    Biconnected blocks (iterative Tarjan with an edge stack) as node lists in
+    adj's key order. Blocks share only articulation nodes; isolated nodes are
+    returned as one-node blocks.
+    """
+    disc: Dict[Node, int] = {}
+    low: Dict[Node, int] = {}
+    blocks: List[Set[Node]] = []
+
+    for root in adj:
+        if root in disc:
+            continue
+        disc[root] = low[root] = len(disc)
+        if not adj[root]:
+            blocks.append({root})
+            continue
+
+        edges: List[Tuple[Node, Node]] = []
+        stack: List[Tuple[Node, Optional[Node], Iterator[Node]]] = [(root, None, iter(adj[root]))]
+        while stack:
+            u, parent, it = stack[-1]
+            for w in it:
+                if w == parent:
+                    continue
+                if w not in disc:
+                    disc[w] = low[w] = len(disc)
+                    edges.append((u, w))
+                    stack.append((w, u, iter(adj[w])))
+                    break
+                if disc[w] < disc[u]:               # back edge
+                    low[u] = min(low[u], disc[w])
+                    edges.append((u, w))
+            else:
+                stack.pop()
+                if not stack:
+                    continue
+                p = stack[-1][0]
+                low[p] = min(low[p], low[u])
+                if low[u] >= disc[p]:               # p separates u's subtree: close a block
+                    block: Set[Node] = set()
+                    while True:
+                        e = edges.pop()
+                        block.update(e)
+                        if e == (p, u):
+                            break
+                    blocks.append(block)
+
+    order = {v: i for i, v in enumerate(adj)}
+    return [sorted(b, key=order.__getitem__) for b in blocks]
+
+
+def _color_tree(part: Dict[Node, Set[Node]], colors: List[Color]) -> Dict[Node, Color]:
+    """2-color a tree (or single node) by BFS depth parity, no search needed."""
+    c0, c1 = sorted(set(colors))[:2]
+    root = next(iter(part))
+    sol = {root: c0}
+    queue = [root]
+    while queue:
+        u = queue.pop()
+        other = c1 if sol[u] == c0 else c0
+        for w in part[u]:
+            if w not in sol:
+                sol[w] = other
+                queue.append(w)
+    return sol
+
+
+def _solve_parts(parts: List[Dict[Node, Set[Node]]], colors: List[Color], seed: int,
+                 solver, solver_kwargs: Dict) -> Optional[List[Dict[Node, Color]]]:
+    """Solve several subgraphs in one worker; None as soon as one is uncolorable."""
+    sols = []
+    for part in parts:
+        # most parts of a sparse map are trees, which never need the solver
+        if len(set(colors)) >= 2 and count_edges(part) == len(part) - 1:
+            sols.append(_color_tree(part, colors))
+            continue
+        sol = solver(part, colors, seed=seed, **solver_kwargs)
+        if sol is None:
+            return None
+        sols.append(sol)
+    return sols
+
+
+def _solve_chunk(task):
+    """Pool entry point: (chunk, _solve_parts args) -> (chunk, solutions or None)."""
+    chunk, *args = task
+    return chunk, _solve_parts(*args)
+
+
+def _merge_blocks(blocks: List[List[Node]], block_sols: List[Dict[Node, Color]]) -> Dict[Node, Color]:
+    """
+    Glue independently colored blocks along the block-cut tree: each block is
+    reached through one already colored articulation node, and swapping two
+    colors inside the block makes it agree there without breaking the block.
+    """
+    node_blocks: Dict[Node, List[int]] = {}
+    for b, nodes in enumerate(blocks):
+        for v in nodes:
+            node_blocks.setdefault(v, []).append(b)
+
+    merged: Dict[Node, Color] = {}
+    done = [False] * len(blocks)
+    for start in range(len(blocks)):
+        if done[start]:
+            continue
+        done[start] = True
+        queue = [start]
+        merged.update((v, block_sols[start][v]) for v in blocks[start])
+        while queue:
+            b = queue.pop()
+            for v in blocks[b]:
+                for nb in node_blocks[v]:
+                    if done[nb]:
+                        continue
+                    done[nb] = True
+                    sol = block_sols[nb]
+                    want, have = merged[v], sol[v]
+                    swap = {want: have, have: want}
+                    merged.update((u, swap.get(sol[u], sol[u])) for u in blocks[nb])
+                    queue.append(nb)
+    return merged
+
+
+def solve_map_coloring_components(adj: Graph, colors: List[Color], seed: int = 0,
+                                  workers: Optional[int] = None,
+                                  biconnected: bool = False,
+                                  solver=solve_map_coloring_bitset,
+                                  **solver_kwargs) -> Optional[Dict[Node, Color]]:
+    """
+    Split the map into connected components (or biconnected blocks), color them
+    independently with `solver` across a process pool and merge the results.
+    Returns None as soon as any part is uncolorable with the given colors;
+    the worker processes are terminated, including chunks still running.
+
+    workers=None uses os.cpu_count(), workers=1 solves in this process.
+    Parts are batched into roughly equal-sized chunks so thousands of tiny
+    components do not turn into thousands of pool tasks, and trees are
+    2-colored directly. _stats_* counters are summed over the parts that went
+    through `solver`, plus _stats_parts.
+    """
+    if isinstance(adj, CSRGraph):
+        adj = adj.to_dict()
+    parts_nodes = biconnected_components(adj) if biconnected else connected_components(adj)
+    parts = []
+    for nodes in parts_nodes:
+        if biconnected:
+            members = set(nodes)
+            parts.append({v: adj[v] & members for v in nodes})
+        else:
+            parts.append({v: adj[v] for v in nodes})
+
+    workers = workers or os.cpu_count() or 1
+    # largest parts first, dealt round-robin so chunks end up similar in size
+    by_size = sorted(range(len(parts)), key=lambda i: -len(parts[i]))
+    n_chunks = min(len(parts), workers * 4)
+    chunks: List[List[int]] = [by_size[c::n_chunks] for c in range(n_chunks)]
+
+    part_sols: List[Optional[Dict[Node, Color]]] = [None] * len(parts)
+    if workers == 1:
+        for chunk in chunks:
+            sols = _solve_parts([parts[i] for i in chunk], colors, seed, solver, solver_kwargs)
+            if sols is None:
+                return None
+            for i, sol in zip(chunk, sols):
+                part_sols[i] = sol
+    else:
+        import multiprocessing
+        # a plain Pool, not a `with ProcessPoolExecutor`: its shutdown waits for the
+        # chunks already running, terminate() stops them as soon as one part fails
+        pool = multiprocessing.Pool(workers)
+        try:
+            tasks = [(chunk, [parts[i] for i in chunk], colors, seed, solver, solver_kwargs) for chunk in chunks]
+            for chunk, sols in pool.imap_unordered(_solve_chunk, tasks):
+                if sols is None:
+                    return None
+                for i, sol in zip(chunk, sols):
+                    part_sols[i] = sol
+        finally:
+            pool.terminate()
+            pool.join()
+
+    stats: Dict[str, int] = {"parts": len(parts)}
+    for sol in part_sols:
+        for key, value in pop_stats(sol).items():
+            stats[key] = stats.get(key, 0) + value
+
+    if biconnected:
+        sol = _merge_blocks(parts_nodes, part_sols)
+    else:
+        sol = {}
+        for part_sol in part_sols:
+            sol.update(part_sol)
+    for key, value in stats.items():
+        sol[f"_stats_{key}"] = value
+    return sol
+
+
+# ---------------------------
+# Local search (huge maps: no completeness, but no search tree either)
+# ---------------------------
+
+def _dsatur(nbrs: List[List[int]], k: int) -> List[int]:
+    """
+    Greedy DSATUR: repeatedly color the node seeing the most distinct colors
+    (ties -> higher degree) with the lowest color none of its neighbors use,
+    or, if all k are taken, the color fewest neighbors use.
+    """
+    n = len(nbrs)
+    col = [-1] * n
+    seen = [0] * n                       # bitmask of neighbor colors
+    used = [0] * (n * k)                 # used[i*k + c] = neighbors of i colored c
+    heap = [(0, -len(nbrs[i]), i) for i in range(n)]
+    heapq.heapify(heap)
+    while heap:
+        _, _, i = heapq.heappop(heap)
+        if col[i] >= 0:
+            continue
+        free = [c for c in range(k) if not seen[i] >> c & 1]
+        c = free[0] if free else min(range(k), key=lambda c: used[i * k + c])
+        col[i] = c
+        for w in nbrs[i]:
+            used[w * k + c] += 1
+            if col[w] < 0 and not seen[w] >> c & 1:
+                seen[w] |= 1 << c
+                heapq.heappush(heap, (-bin(seen[w]).count("1"), -len(nbrs[w]), w))
+    return col
+
+
+def dsatur_coloring(adj: Graph, colors: List[Color]) -> Dict[Node, Color]:
+    """DSATUR greedy coloring; may contain conflicts if len(colors) is too small."""
+    nodes, nbrs = _index_graph(adj)
+    colors = sorted(set(colors))
+    return {nodes[i]: colors[c] for i, c in enumerate(_dsatur(nbrs, len(colors)))}
+
+
+LOCAL_SEARCH_SAMPLE = 64     # conflicted nodes examined per local-search step
+
+
+def solve_map_coloring_local(adj: Graph, colors: List[Color], seed: int = 0,
+                             max_iters: Optional[int] = None,
+                             time_limit: float = 10.0,
+                             warm_start: str = "dsatur") -> Optional[Dict[Node, Color]]:
+    """
+    Min-conflicts / tabu local search (TabuCol style), for maps too big for
+    backtracking. Each step makes the best recoloring among conflicted nodes
+    (a random sample of LOCAL_SEARCH_SAMPLE of them on big maps), skipping
+    (node, color) pairs recently left unless that would beat the best conflict
+    count so far.
+    gamma[i*k + c] (neighbors of i colored c) and the conflicted node list are
+    updated incrementally, so a move costs O(degree).
+
+    Starts from a DSATUR coloring (warm_start="dsatur") or uniformly random
+    colors ("random"). Stops at max_iters or time_limit seconds and returns
+    None if conflicts remain. Solutions are checked with is_valid_coloring and
+    carry _stats_iters and _stats_iters_per_sec (search loop only, without
+    the warm start).
+    """
+    if warm_start not in ("dsatur", "random"):
+        raise ValueError(f"warm_start must be 'dsatur' or 'random', got {warm_start!r}")
+    t0 = time.perf_counter()
+    rng = random.Random(seed)
+    nodes, nbrs = _index_graph(adj)
+    colors = sorted(set(colors))
+    n, k = len(nodes), len(colors)
+    if k == 0:
+        return None if n else {}
+
+    col = _dsatur(nbrs, k) if warm_start == "dsatur" else [rng.randrange(k) for _ in range(n)]
+    gamma = [0] * (n * k)
+    for i in range(n):
+        for w in nbrs[i]:
+            gamma[w * k + col[i]] += 1
+
+    # conflicted nodes as a list + position index for O(1) add/remove/sample
+    conflicted: List[int] = []
+    pos = [-1] * n
+
+    def mark(i: int) -> None:
+        bad = gamma[i * k + col[i]] > 0
+        if bad and pos[i] < 0:
+            pos[i] = len(conflicted)
+            conflicted.append(i)
+        elif not bad and pos[i] >= 0:
+            last = conflicted.pop()
+            if last != i:
+                conflicted[pos[i]] = last
+                pos[last] = pos[i]
+            pos[i] = -1
+
+    for i in range(n):
+        mark(i)
+    conflicts = sum(gamma[i * k + col[i]] for i in range(n)) // 2
+    best = conflicts
+    tabu = [0] * (n * k)                 # iteration until which (node, color) is tabu
+
+    it = 0
+    t_search = time.perf_counter()
+    while conflicted:
+        if max_iters is not None and it >= max_iters:
+            break
+        if it & 1023 == 0 and time.perf_counter() - t0 > time_limit:
+            break
+        it += 1
+
+        if len(conflicted) <= LOCAL_SEARCH_SAMPLE:
+            candidates = conflicted
+        else:
+            candidates = rng.sample(conflicted, LOCAL_SEARCH_SAMPLE)
+        i, new, best_delta, ties = -1, -1, None, 0
+        for v in candidates:
+            base = v * k
+            here = gamma[base + col[v]]
+            for c in range(k):
+                if c == col[v]:
+                    continue
+                delta = gamma[base + c] - here
+                if tabu[base + c] > it and conflicts + delta >= best:
+                    continue
+                if best_delta is None or delta < best_delta:
+                    i, new, best_delta, ties = v, c, delta, 1
+                elif delta == best_delta:
+                    ties += 1                        # uniform choice among equal moves
+                    if rng.randrange(ties) == 0:
+                        i, new = v, c
+        if i < 0:
+            continue
+
+        old = col[i]
+        conflicts += best_delta
+        best = min(best, conflicts)
+        tabu[i * k + old] = it + int(0.6 * len(conflicted)) + rng.randrange(10)
+        col[i] = new
+        for w in nbrs[i]:
+            gamma[w * k + old] -= 1
+            gamma[w * k + new] += 1
+            if col[w] == old or col[w] == new:
+                mark(w)
+        mark(i)
+
+    if conflicted:
+        return None
+    sol = {nodes[i]: colors[c] for i, c in enumerate(col)}
+    if not is_valid_coloring(adj, sol):
+        raise RuntimeError("local search produced an invalid coloring")
+    elapsed = time.perf_counter() - t_search
+    sol["_stats_iters"] = it
+    sol["_stats_iters_per_sec"] = int(it / elapsed) if elapsed > 0 else 0
+    return sol
+
+
+# ---------------------------
+# Portfolio: race several solver configurations, keep the first answer
+# ---------------------------
+
+# name -> keyword arguments; "engine" picks the solver (default "bitset")
+PORTFOLIO_CONFIGS: Dict[str, Dict] = {
+    "fc": {"propagation": "fc"},
+    "mac": {"propagation": "mac"},
+    "fc-nolcv": {"propagation": "fc", "lcv": False},
+    "cbj+nogoods": {"backjumping": True, "nogoods": 1000},
+    "restarts": {"backjumping": True, "nogoods": 1000, "restarts": 30},
+    "local": {"engine": "local", "time_limit": 60.0},
+}
+
+PORTFOLIO_ENGINES = {
+    "bitset": solve_map_coloring_bitset,
+    "sets": solve_map_coloring,
+    "local": solve_map_coloring_local,
+}
+
+
+def _portfolio_worker(results, name: str, config: Dict, adj: Graph, colors: List[Color], seed: int) -> None:
+    kwargs = dict(config)
+    engine = kwargs.pop("engine", "bitset")
+    t0 = time.perf_counter()
+    try:
+        sol = PORTFOLIO_ENGINES[engine](adj, colors, seed=seed, **kwargs)
+    except Exception as exc:
+        # always report back: the parent counts answers, a silent death would stall it
+        results.put((name, None, False, time.perf_counter() - t0, repr(exc)))
+        return
+    # only local search can give up without proving anything
+    results.put((name, sol, engine != "local", time.perf_counter() - t0, None))
+
+
+def solve_map_coloring_portfolio(adj: Graph, colors: List[Color], seed: int = 0,
+                                 configs: Optional[Dict[str, Dict]] = None,
+                                 timeout: Optional[float] = None,
+                                 log_path: Optional[str] = None) -> Optional[Dict[Node, Color]]:
+    """
+    Run every configuration (default PORTFOLIO_CONFIGS) in its own process,
+    each with a different seed, and return the first valid coloring; the other
+    processes are terminated. A complete solver answering None proves the map
+    uncolorable and also ends the race. Returns None on that or on timeout.
+    A configuration that raises counts as giving up; if every one of them
+    raised, RuntimeError lists the errors (None would read as a proof).
+
+    The winner is reported as _stats_winner (plus its own _stats_* counters)
+    and, with log_path, appended as one JSON line per run so the defaults can
+    be tuned from production statistics.
+    """
+    configs = PORTFOLIO_CONFIGS if configs is None else configs
+    import inspect
+    for name, config in configs.items():
+        kwargs = dict(config)
+        engine = kwargs.pop("engine", "bitset")
+        if engine not in PORTFOLIO_ENGINES:
+            raise ValueError(f"config {name!r}: unknown engine {engine!r}")
+        try:
+            inspect.signature(PORTFOLIO_ENGINES[engine]).bind(adj, colors, seed=seed, **kwargs)
+        except TypeError as e:
+            raise ValueError(f"config {name!r}: {e}") from None
+
+    # process machinery is only needed here; keep it out of `import task3`
+    import multiprocessing
+    import queue
+
+    t0 = time.perf_counter()
+    ctx = multiprocessing.get_context()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_portfolio_worker, args=(results, name, config, adj, colors, seed + i),
+                         daemon=True)
+             for i, (name, config) in enumerate(configs.items())]
+    for proc in procs:
+        proc.start()
+
+    winner, sol, pending, solve_seconds = None, None, len(procs), None
+    errors: Dict[str, str] = {}
+    try:
+        while pending:
+            left = None if timeout is None else timeout - (time.perf_counter() - t0)
+            if left is not None and left <= 0:
+                break
+            try:
+                name, res, complete, seconds, error = results.get(timeout=left)
+            except queue.Empty:
+                break
+            pending -= 1
+            if error is not None:
+                errors[name] = error
+                continue
+            solve_seconds = seconds
+            if res is None:
+                if complete:
+                    winner = name            # proved uncolorable
+                    break
+                continue
+            stats = pop_stats(res)
+            if is_valid_coloring(adj, res):
+                winner, sol = name, res
+                for key, value in stats.items():
+                    sol[f"_stats_{key}"] = value
+                break
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs:
+            proc.join()
+        results.close()
+
+    elapsed = time.perf_counter() - t0
+    if log_path is not None:
+        import json
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "winner": winner,
+                  "solved": sol is not None, "seconds": round(elapsed, 4),
+                  "winner_seconds": None if winner is None else round(solve_seconds, 4),
+                  "nodes": len(adj), "edges": count_edges(adj), "colors": len(colors),
+                  "configs": list(configs), "errors": errors}
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    if sol is None and winner is None and len(errors) == len(procs):
+        raise RuntimeError("every portfolio configuration failed: "
+                           + "; ".join(f"{n}: {e}" for n, e in errors.items()))
     if sol is not None:
-        sol["_stats_calls"] = stats["calls"]
-        sol["_stats_fails"] = stats["fails"]
+        sol["_stats_winner"] = winner
     return sol
 
 
@@ -170,26 +1255,31 @@ def generate_random_solvable_map(n: int = 18,
                                  p: float = 0.22,
                                  k: int = 4,
                                  seed: int = 42,
-                                 max_tries: int = 300) -> Tuple[Dict[Node, Set[Node]], Dict[Node, Color], List[Color]]:
+                                 max_tries: int = 300,
+                                 csr: bool = False) -> Tuple[Graph, Dict[Node, Color], List[Color]]:
     """
     Re-generate random graphs until solvable with k colors.
+    csr=True uses the NumPy generator (CSRGraph) and the bitset solver, for big maps.
     """
     colors = [f"C{i+1}" for i in range(k)]
 
     for t in range(max_tries):
-        adj = generate_random_graph(n=n, p=p, seed=seed + t)
-        sol = solve_map_coloring(adj, colors, seed=seed + t)
+        if csr:
+            adj = generate_random_graph_csr(n=n, p=p, seed=seed + t)
+            sol = solve_map_coloring_bitset(adj, colors, seed=seed + t)
+        else:
+            adj = generate_random_graph(n=n, p=p, seed=seed + t)
+            sol = solve_map_coloring(adj, colors, seed=seed + t)
         if sol is None:
             continue
 
         # Remove stats keys for validation
-        stats_calls = sol.pop("_stats_calls", None)
-        stats_fails = sol.pop("_stats_fails", None)
+        stats = pop_stats(sol)
 
         if is_valid_coloring(adj, sol):
-            # put stats back in a separate dict for reporting if needed
-            sol["_stats_calls"] = stats_calls
-            sol["_stats_fails"] = stats_fails
+            # put stats back for reporting if needed
+            for key, value in stats.items():
+                sol[f"_stats_{key}"] = value
             return adj, sol, colors
 
     raise RuntimeError("Could not generate solvable map. Try increasing k or lowering p.")
@@ -199,10 +1289,20 @@ def generate_random_solvable_map(n: int = 18,
 # Visualization (optional)
 # ---------------------------
 
-def plot_graph_coloring(adj: Dict[Node, Set[Node]], assignment: Dict[Node, Color], title: str = "") -> None:
+# node labels and big markers only make sense on small maps
+PLOT_LABEL_MAX_NODES = 200
+
+
+def plot_graph_coloring(adj: Graph, assignment: Dict[Node, Color], title: str = "",
+                        out_path: Optional[str] = None) -> None:
     """
     Simple visualization using random 2D positions (not a true geographic map, but clear for demo).
+    All edges go into one LineCollection, so large maps render in seconds.
+    With out_path the figure is written as PNG on an Agg canvas instead of
+    opening a window (usable in batch runs / without a display).
     """
+    from matplotlib.collections import LineCollection
+
     nodes = list(adj.keys())
     n = len(nodes)
     rng = np.random.default_rng(0)
@@ -213,27 +1313,27 @@ def plot_graph_coloring(adj: Dict[Node, Set[Node]], assignment: Dict[Node, Color
     color_to_id = {c: i for i, c in enumerate(unique_colors)}
     node_colors = [color_to_id.get(assignment.get(v, unique_colors[0]), 0) for v in nodes]
 
-    plt.figure(figsize=(7, 6))
+    small = n <= PLOT_LABEL_MAX_NODES
+    fig, ax = new_figure((7, 6), out_path)
     # edges
-    for u in nodes:
-        for v in adj[u]:
-            if u < v:
-                x = [pos[u, 0], pos[v, 0]]
-                y = [pos[u, 1], pos[v, 1]]
-                plt.plot(x, y, linewidth=1)
+    src, dst = edge_arrays(adj)
+    segments = np.stack([pos[src], pos[dst]], axis=1)
+    ax.add_collection(LineCollection(segments, linewidths=1 if small else 0.2,
+                                     colors="tab:blue" if small else "0.6"))
 
     # nodes
-    plt.scatter(pos[:, 0], pos[:, 1], s=250, c=node_colors)
+    ax.scatter(pos[:, 0], pos[:, 1], s=250 if small else 4, c=node_colors, zorder=2)
 
     # labels
-    for i in nodes:
-        plt.text(pos[i, 0], pos[i, 1], str(i), ha="center", va="center", fontsize=10)
+    if small:
+        for i in nodes:
+            ax.text(pos[i, 0], pos[i, 1], str(i), ha="center", va="center", fontsize=10)
 
     if title:
-        plt.title(title)
-    plt.xticks([])
-    plt.yticks([])
-    plt.show()
+        ax.set_title(title)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    finish_figure(fig, out_path)
 
 
 # ---------------------------
@@ -248,8 +1348,9 @@ def main():
 
     adj, sol, colors = generate_random_solvable_map(n=N_DISTRICTS, p=EDGE_PROB, k=K_COLORS, seed=7)
 
-    calls = sol.pop("_stats_calls", None)
-    fails = sol.pop("_stats_fails", None)
+    stats = pop_stats(sol)
+    calls = stats.get("calls")
+    fails = stats.get("fails")
 
     print("=== TASK 3: MAP COLORING CSP ===")
     print(f"Districts: {N_DISTRICTS}")
@@ -1,31 +1,7 @@
-import pandas as pd
-
 import os
-print("Current working directory:", os.getcwd())
-print("Files here:", os.listdir())
-
-import numpy as np
-
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
+DATA_PATH = "wine-quality-white-and-red.csv"
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# ----------------------------
-# LOAD DATA
-# ----------------------------
-df = pd.read_csv("wine-quality-white-and-red.csv")
-
-
-
-print("Dataset shape:", df.shape)
-print(df.head())
 
 # ----------------------------
 # PREPROCESSING
@@ -40,64 +16,99 @@ def quality_class(q):
     else:
         return "high"
 
-df["quality_label"] = df["quality"].apply(quality_class)
 
-print("\nClass distribution:")
-print(df["quality_label"].value_counts())
+def main():
+    # pandas / sklearn / matplotlib / seaborn take a while to import: only pay for them when running
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-# Encode target labels
-le = LabelEncoder()
-y = le.fit_transform(df["quality_label"])
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler, LabelEncoder
+    from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 
-# Features
-X = df.drop(["quality", "quality_label"], axis=1)
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.svm import SVC
 
-# If 'type' column exists, encode it
-if "type" in X.columns:
-    X["type"] = LabelEncoder().fit_transform(X["type"])
+    # ----------------------------
+    # LOAD DATA
+    # ----------------------------
+    if not os.path.exists(DATA_PATH):
+        print("Dataset not found:", DATA_PATH)
+        print("Current working directory:", os.getcwd())
+        return
+    df = pd.read_csv(DATA_PATH)
 
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.25, random_state=42, stratify=y
-)
+    print("Dataset shape:", df.shape)
+    print(df.head())
 
-# Scale features
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
+    # ----------------------------
+    # PREPROCESSING
+    # ----------------------------
 
-# ----------------------------
-# MODELS
-# ----------------------------
-models = {
-    "Logistic Regression": LogisticRegression(max_iter=1000),
-    "Random Forest": RandomForestClassifier(n_estimators=200, random_state=42),
-    "SVM (RBF)": SVC(kernel="rbf", gamma="auto")
-}
+    df["quality_label"] = df["quality"].apply(quality_class)
 
-results = {}
+    print("\nClass distribution:")
+    print(df["quality_label"].value_counts())
 
-for name, model in models.items():
-    print(f"\n=== {name} ===")
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
+    # Encode target labels
+    le = LabelEncoder()
+    y = le.fit_transform(df["quality_label"])
 
-    acc = accuracy_score(y_test, y_pred)
-    print("Accuracy:", acc)
-    print(classification_report(y_test, y_pred, target_names=le.classes_))
+    # Features
+    X = df.drop(["quality", "quality_label"], axis=1)
 
-    results[name] = confusion_matrix(y_test, y_pred)
+    # If 'type' column exists, encode it
+    if "type" in X.columns:
+        X["type"] = LabelEncoder().fit_transform(X["type"])
 
-# ----------------------------
-# CONFUSION MATRICES
-# ----------------------------
-fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+    # Train-test split
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.25, random_state=42, stratify=y
+    )
+
+    # Scale features
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+
+    # ----------------------------
+    # MODELS
+    # ----------------------------
+    models = {
+        "Logistic Regression": LogisticRegression(max_iter=1000),
+        "Random Forest": RandomForestClassifier(n_estimators=200, random_state=42),
+        "SVM (RBF)": SVC(kernel="rbf", gamma="auto")
+    }
+
+    results = {}
+
+    for name, model in models.items():
+        print(f"\n=== {name} ===")
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+
+        acc = accuracy_score(y_test, y_pred)
+        print("Accuracy:", acc)
+        print(classification_report(y_test, y_pred, target_names=le.classes_))
+
+        results[name] = confusion_matrix(y_test, y_pred)
+
+    # ----------------------------
+    # CONFUSION MATRICES
+    # ----------------------------
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+
+    for ax, (name, cm) in zip(axes, results.items()):
+        sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax)
+        ax.set_title(name)
+        ax.set_xlabel("Predicted")
+        ax.set_ylabel("Actual")
+
+    plt.tight_layout()
+    plt.show()
 
-for ax, (name, cm) in zip(axes, results.items()):
-    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax)
-    ax.set_title(name)
-    ax.set_xlabel("Predicted")
-    ax.set_ylabel("Actual")
 
-plt.tight_layout()
-plt.show()
+if __name__ == "__main__":
+    main()
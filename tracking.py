@@ -0,0 +1,115 @@
+"""
+Detect-then-track for realtime recognition: faces found by the Haar cascade
+every few frames become tracks, followed in between by template matching.
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from config import TRACK_IOU, TRACK_MIN_SCORE, TRACK_MAX_MISSES
+from utils import Box
+
+
+@dataclass
+class FaceTrack:
+    track_id: int
+    box: Box
+    template: np.ndarray          # gray crop of the face at the last detection
+    name: str = "Unknown"
+    conf: float = float("inf")
+    recognized_at: int = -1       # frame index of the last LBPH prediction (-1 = never)
+    misses: int = 0               # detection rounds in a row without a matching face
+
+
+def iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+class FaceTracker:
+    """
+    Keeps one FaceTrack per visible face. update() takes the detector output
+    on detection frames (boxes) and None on the frames in between.
+    """
+
+    def __init__(self, match_iou: float = TRACK_IOU, min_score: float = TRACK_MIN_SCORE,
+                 max_misses: int = TRACK_MAX_MISSES):
+        self.match_iou = match_iou
+        self.min_score = min_score
+        self.max_misses = max_misses
+        self.tracks: List[FaceTrack] = []
+        self._next_id = 0
+
+    def reset(self):
+        """Forget all tracks (e.g. between unrelated still images)."""
+        self.tracks = []
+
+    def update(self, gray, boxes: Optional[List[Box]] = None) -> List[FaceTrack]:
+        if boxes is None:
+            self._follow(gray)
+        else:
+            self._associate(gray, boxes)
+        return self.tracks
+
+    def _associate(self, gray, boxes: List[Box]):
+        # greedy matching, best overlap first
+        pairs = sorted(((iou(t.box, b), ti, bi) for ti, t in enumerate(self.tracks)
+                        for bi, b in enumerate(boxes)), reverse=True)
+        used_tracks, used_boxes = set(), set()
+        for overlap, ti, bi in pairs:
+            if overlap < self.match_iou:
+                break
+            if ti in used_tracks or bi in used_boxes:
+                continue
+            used_tracks.add(ti)
+            used_boxes.add(bi)
+            t = self.tracks[ti]
+            t.box = boxes[bi]
+            t.template = _crop(gray, t.box)
+            t.misses = 0
+
+        kept = []
+        for ti, t in enumerate(self.tracks):
+            if ti not in used_tracks:
+                t.misses += 1
+                if t.misses > self.max_misses:
+                    continue
+            kept.append(t)
+        for bi, b in enumerate(boxes):
+            if bi not in used_boxes:
+                kept.append(FaceTrack(self._next_id, b, _crop(gray, b)))
+                self._next_id += 1
+        self.tracks = kept
+
+    def _follow(self, gray):
+        """Move every track to the best template match near its last position; drop lost ones."""
+        H, W = gray.shape[:2]
+        kept = []
+        for t in self.tracks:
+            x, y, w, h = t.box
+            th, tw = t.template.shape[:2]
+            # search window: the box grown by half its size on each side
+            x0, y0 = max(0, x - w // 2), max(0, y - h // 2)
+            x1, y1 = min(W, x + w + w // 2), min(H, y + h + h // 2)
+            if x1 - x0 < tw or y1 - y0 < th:
+                continue
+            res = cv2.matchTemplate(gray[y0:y1, x0:x1], t.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (mx, my) = cv2.minMaxLoc(res)
+            if score < self.min_score:
+                continue
+            t.box = (x0 + mx, y0 + my, w, h)
+            kept.append(t)
+        self.tracks = kept
+
+
+def _crop(gray, box: Box):
+    x, y, w, h = box
+    return gray[y:y+h, x:x+w].copy()
@@ -1,39 +1,238 @@
+import argparse
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
 import cv2
 import numpy as np
 
-from config import DB_DIR, MODEL_PATH, LABELS_PATH, CONF_THRESHOLD, FACE_SIZE
+from config import (DB_DIR, MODEL_PATH, LABELS_PATH, CONF_THRESHOLD, FACE_SIZE,
+                    DB_CACHE_DIR, LOAD_WORKERS, ROC_REPORT_PATH)
 from utils import ensure_dir
+from sources import IMAGE_EXTS
+from lbp import LBPIndex
+from gallery import save_gallery
+
+CACHE_FACES = "faces.npy"    # uint8 (N, h, w), memory-mapped on load
+CACHE_INDEX = "index.npz"    # paths (relative to DB_DIR) and mtimes of the N rows
 
-def load_db():
+def scan_db():
+    """Person folders (sorted; the label is the position) and their image files with mtimes."""
     if not os.path.isdir(DB_DIR):
         raise RuntimeError(f"Missing DB folder: {DB_DIR}")
 
-    X, y = [], []
-    label_to_name = {}
-    label = 0
-
+    persons, files = [], []
     for person in sorted(os.listdir(DB_DIR)):
         pdir = os.path.join(DB_DIR, person)
         if not os.path.isdir(pdir):
             continue
+        persons.append(person)
+        for fn in sorted(os.listdir(pdir)):
+            if fn.lower().endswith(IMAGE_EXTS):
+                rel = os.path.join(person, fn)
+                files.append((rel, os.path.getmtime(os.path.join(DB_DIR, rel))))
+    return persons, files
 
-        label_to_name[label] = person
-        for fn in os.listdir(pdir):
-            if fn.lower().endswith((".png", ".jpg", ".jpeg")):
-                img = cv2.imread(os.path.join(pdir, fn), cv2.IMREAD_GRAYSCALE)
-                if img is None:
-                    continue
-                img = cv2.resize(img, FACE_SIZE, interpolation=cv2.INTER_AREA)
-                X.append(img)
-                y.append(label)
+def read_face(path: str):
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    # enrolled crops are already FACE_SIZE (w, h): only resize foreign images
+    if img.shape[::-1] != tuple(FACE_SIZE):
+        img = cv2.resize(img, FACE_SIZE, interpolation=cv2.INTER_AREA)
+    return img
+
+def read_faces(paths, workers: int = LOAD_WORKERS):
+    if len(paths) < 2 or workers <= 1:
+        return [read_face(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_face, paths, chunksize=32))
+
+def load_cached_faces(files, workers: int = LOAD_WORKERS):
+    """
+    Faces for `files` [(relpath, mtime)] from the packed cache in DB_CACHE_DIR,
+    decoding only new or modified images and dropping removed ones. The cache
+    is rewritten (atomically) only when something changed.
+    Returns (faces memmap, relpaths of its rows); unreadable images are skipped.
+    """
+    faces_path = os.path.join(DB_CACHE_DIR, CACHE_FACES)
+    index_path = os.path.join(DB_CACHE_DIR, CACHE_INDEX)
+
+    cached = {}
+    faces = None
+    if os.path.exists(faces_path) and os.path.exists(index_path):
+        index = np.load(index_path)
+        faces = np.load(faces_path, mmap_mode="r")
+        if faces.shape[1:] == (FACE_SIZE[1], FACE_SIZE[0]):
+            cached = {p: (row, m) for row, (p, m) in enumerate(zip(index["paths"].tolist(), index["mtimes"]))}
+
+    todo = [rel for rel, mtime in files if rel not in cached or cached[rel][1] != mtime]
+    wanted = [rel for rel, _ in files]
+    if not todo and len(cached) == len(files):
+        # same files, same mtimes; the cache may just be in a different order
+        order = np.array([cached[rel][0] for rel in wanted], dtype=np.int64)
+        if np.array_equal(order, np.arange(len(order))):
+            return faces, wanted
+        return faces[order], wanted
+
+    decoded = dict(zip(todo, read_faces([os.path.join(DB_DIR, rel) for rel in todo], workers)))
+    mtimes = dict(files)
+    rows, paths = [], []
+    for rel in wanted:
+        img = decoded[rel] if rel in decoded else faces[cached[rel][0]]
+        if img is None:
+            continue
+        rows.append(img)
+        paths.append(rel)
+    packed = np.stack(rows) if rows else np.zeros((0, FACE_SIZE[1], FACE_SIZE[0]), dtype=np.uint8)
 
-        label += 1
+    ensure_dir(DB_CACHE_DIR)
+    np.save(faces_path + ".tmp.npy", packed)
+    np.savez(index_path + ".tmp.npz", paths=np.array(paths),
+             mtimes=np.array([mtimes[p] for p in paths], dtype=np.float64))
+    del rows, faces  # release the old mapping before replacing the file
+    os.replace(faces_path + ".tmp.npy", faces_path)
+    os.replace(index_path + ".tmp.npz", index_path)
+    print(f"[LOAD] cache updated: {len(todo)} decoded, {len(files) - len(todo)} reused -> {DB_CACHE_DIR}")
+    return np.load(faces_path, mmap_mode="r"), paths
+
+def load_labels():
+    """label -> name of the saved model ({} before the first training)."""
+    if not os.path.exists(LABELS_PATH):
+        return {}
+    return np.load(LABELS_PATH, allow_pickle=True).item()
+
+def assign_labels(persons, known):
+    """Known people keep their label id; new people get ids after the largest one in use."""
+    label_of = {name: label for label, name in known.items() if name in persons}
+    next_label = max(known, default=-1) + 1
+    for person in persons:
+        if person not in label_of:
+            label_of[person] = next_label
+            next_label += 1
+    return {label: name for name, label in sorted(label_of.items(), key=lambda kv: kv[1])}
+
+def save_model(model, label_to_name):
+    """
+    Write labels, the model, then the binary gallery, each to a temp file
+    moved into place with os.replace: a running realtime.py never reads a
+    half-written file, and it reloads on the model's (or gallery's) mtime,
+    by which point the labels are complete.
+    """
+    root, ext = os.path.splitext(LABELS_PATH)
+    np.save(f"{root}.tmp{ext}", label_to_name)
+    os.replace(f"{root}.tmp{ext}", LABELS_PATH)
+    root, ext = os.path.splitext(MODEL_PATH)
+    model.save(f"{root}.tmp{ext}")
+    os.replace(f"{root}.tmp{ext}", MODEL_PATH)
+    save_gallery(LBPIndex.from_model(model, label_to_name))
+
+def load_db(use_cache: bool = True, workers: int = LOAD_WORKERS):
+    t0 = time.perf_counter()
+    persons, files = scan_db()
+    label_to_name = assign_labels(persons, load_labels())
+    label_of = {person: label for label, person in label_to_name.items()}
+
+    if use_cache:
+        faces, paths = load_cached_faces(files, workers)
+        X = list(faces)
+    else:
+        imgs = read_faces([os.path.join(DB_DIR, rel) for rel, _ in files], workers)
+        X, paths = [], []
+        for (rel, _), img in zip(files, imgs):
+            if img is not None:
+                X.append(img)
+                paths.append(rel)
+    y = [label_of[rel.split(os.sep)[0]] for rel in paths]
+    print(f"[LOAD] {len(X)} faces, {len(persons)} people in {time.perf_counter() - t0:.2f}s")
 
     if len(X) < 20:
         raise RuntimeError("Not enough images. Enroll 2+ people with ~20-30 samples each.")
     return X, np.array(y, dtype=np.int32), label_to_name
 
+THRESHOLDS = np.arange(0.0, 200.5, 0.5)   # LBPH chi-square confidences live well inside this
+
+def new_model():
+    return cv2.face.LBPHFaceRecognizer_create(radius=1, neighbors=8, grid_x=8, grid_y=8)
+
+def predict_all(model, X):
+    """One predict per image, collected as (labels int32, confidences float64) arrays."""
+    preds = [model.predict(img) for img in X]
+    return (np.array([p[0] for p in preds], dtype=np.int32),
+            np.array([p[1] for p in preds], dtype=np.float64))
+
+def threshold_sweep(pred, conf, true, thresholds=THRESHOLDS):
+    """
+    Metrics for every threshold at once (rows of a thresholds x samples mask).
+    All test faces belong to enrolled people, so per threshold:
+      accuracy = accepted with the right name (the metric train_model reports)
+      far      = accepted with a wrong name (false accept)
+      frr      = rejected as Unknown (false reject)
+    """
+    accepted = conf[None, :] <= np.asarray(thresholds)[:, None]
+    right = (pred == true)[None, :]
+    n = max(1, len(conf))
+    return {
+        "threshold": np.asarray(thresholds, dtype=np.float64),
+        "accuracy": (accepted & right).sum(axis=1) / n,
+        "far": (accepted & ~right).sum(axis=1) / n,
+        "frr": (~accepted).sum(axis=1) / n,
+    }
+
+def summarize_sweep(sweep, tag: str = "TRAIN"):
+    t = sweep["threshold"]
+    cur = int(np.argmin(np.abs(t - CONF_THRESHOLD)))
+    best = int(np.argmax(sweep["accuracy"]))
+    eer = int(np.argmin(np.abs(sweep["far"] - sweep["frr"])))
+    for what, i in (("current", cur), ("best accuracy", best), ("FAR~FRR", eer)):
+        print(f"[{tag}] {what:>13}: threshold={t[i]:.1f} | accuracy={sweep['accuracy'][i]:.3f} "
+              f"far={sweep['far'][i]:.3f} frr={sweep['frr'][i]:.3f}")
+
+def write_roc_report(sweep, path: str = ROC_REPORT_PATH, tag: str = "TRAIN"):
+    cols = ["threshold", "accuracy", "far", "frr"]
+    table = np.column_stack([sweep[c] for c in cols])
+    np.savetxt(path, table, delimiter=",", header=",".join(cols), comments="", fmt="%.4f")
+    print(f"[{tag}] ROC report -> {path}")
+
+_fold_data = None
+
+def _init_fold_worker(X, y):
+    # the faces travel to each worker once, not with every fold
+    global _fold_data
+    _fold_data = (X, y)
+
+def _run_fold(test_idx):
+    X, y = _fold_data
+    mask = np.ones(len(y), dtype=bool)
+    mask[test_idx] = False
+    model = new_model()
+    model.train(list(X[mask]), y[mask])
+    pred, conf = predict_all(model, X[test_idx])
+    return pred, conf, y[test_idx]
+
+def cross_validate(k: int = 5, seed: int = 42, workers: int = LOAD_WORKERS):
+    """k-fold CV with one fold per task in a process pool; sweep over the pooled predictions."""
+    X, y, _ = load_db()
+    X = np.stack(X)
+    idx = np.random.default_rng(seed).permutation(len(X))
+    folds = np.array_split(idx, k)
+
+    t0 = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, k), initializer=_init_fold_worker,
+                                 initargs=(X, y)) as pool:
+            results = list(pool.map(_run_fold, folds))
+    else:
+        _init_fold_worker(X, y)
+        results = [_run_fold(f) for f in folds]
+    pred, conf, true = (np.concatenate(parts) for parts in zip(*results))
+    print(f"[CV] {k} folds, {len(true)} predictions in {time.perf_counter() - t0:.2f}s")
+
+    sweep = threshold_sweep(pred, conf, true)
+    summarize_sweep(sweep, tag="CV")
+    write_roc_report(sweep, tag="CV")
+    return sweep
+
 def train_model(test_ratio: float = 0.25, seed: int = 42):
     if not hasattr(cv2, "face"):
         raise RuntimeError("cv2.face not found. Install opencv-contrib-python.")
@@ -49,24 +248,66 @@ def train_model(test_ratio: float = 0.25, seed: int = 42):
     X_train, X_test = X[:split], X[split:]
     y_train, y_test = y[:split], y[split:]
 
-    model = cv2.face.LBPHFaceRecognizer_create(radius=1, neighbors=8, grid_x=8, grid_y=8)
+    model = new_model()
     model.train(X_train, y_train)
 
-    correct = 0
-    for img, true_label in zip(X_test, y_test):
-        pred, conf = model.predict(img)
-        if conf <= CONF_THRESHOLD and pred == true_label:
-            correct += 1
-    acc = correct / max(1, len(X_test))
+    pred, conf = predict_all(model, X_test)
+    sweep = threshold_sweep(pred, conf, y_test)
+    acc = threshold_sweep(pred, conf, y_test, [CONF_THRESHOLD])["accuracy"][0]
 
-    model.save(MODEL_PATH)
-    np.save(LABELS_PATH, label_to_name)
+    save_model(model, label_to_name)
 
     print(f"[TRAIN] train={len(X_train)} test={len(X_test)}")
     print(f"[TRAIN] threshold={CONF_THRESHOLD} | test accuracy={acc:.3f}")
+    summarize_sweep(sweep)
+    write_roc_report(sweep)
     print(f"[TRAIN] saved -> {MODEL_PATH}")
     print(f"[TRAIN] labels saved -> {LABELS_PATH}")
 
+def add_person(name: str, paths=None):
+    """
+    Incremental enrollment: LBPH update() with `name`'s samples on top of the
+    saved model instead of retraining everyone. paths defaults to every image
+    in DB_DIR/name (for a known name pass only the new ones, or they count twice).
+    A known name keeps its label id, a new one gets the next free id.
+    """
+    if not hasattr(cv2, "face"):
+        raise RuntimeError("cv2.face not found. Install opencv-contrib-python.")
+    if not os.path.exists(MODEL_PATH):
+        raise RuntimeError(f"No model at {MODEL_PATH}. Run train.py first.")
+
+    if paths is None:
+        pdir = os.path.join(DB_DIR, name)
+        if not os.path.isdir(pdir):
+            raise RuntimeError(f"Missing person folder: {pdir}")
+        paths = [os.path.join(pdir, fn) for fn in sorted(os.listdir(pdir)) if fn.lower().endswith(IMAGE_EXTS)]
+    faces = [img for img in read_faces(paths) if img is not None]
+    if not faces:
+        raise RuntimeError(f"No readable samples for {name}.")
+
+    label_to_name = load_labels()
+    label = next((label for label, person in label_to_name.items() if person == name), None)
+    if label is None:
+        label = max(label_to_name, default=-1) + 1
+        label_to_name[label] = name
+
+    model = new_model()
+    model.read(MODEL_PATH)
+    model.update(faces, np.full(len(faces), label, dtype=np.int32))
+    save_model(model, label_to_name)
+
+    print(f"[TRAIN] updated with {len(faces)} samples of {name} (label={label})")
+    print(f"[TRAIN] saved -> {MODEL_PATH}")
+
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Train the LBPH model on faces_db.")
+    ap.add_argument("--cv", type=int, default=0, metavar="K",
+                    help="only run K-fold cross-validation and write the ROC report (no model saved)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for --cv")
+    args = ap.parse_args()
+
     ensure_dir(DB_DIR)
-    train_model()
+    if args.cv:
+        cross_validate(args.cv, workers=args.workers)
+    else:
+        train_model()
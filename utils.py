@@ -1,11 +1,13 @@
 import os
 import cv2
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
-from config import FACE_SIZE
+from config import FACE_SIZE, DETECT_SCALE, ROI_MARGIN, FULL_SCAN_EVERY
 
 Box = Tuple[int, int, int, int]
 
+MIN_FACE = 70  # px at full resolution
+
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
@@ -21,11 +23,78 @@ def detect_largest_face(detector, gray) -> Optional[Box]:
         gray,
         scaleFactor=1.2,
         minNeighbors=5,
-        minSize=(70, 70)
+        minSize=(MIN_FACE, MIN_FACE)
     )
+    return largest(faces)
+
+def largest(faces) -> Optional[Box]:
     if len(faces) == 0:
         return None
-    return sorted(faces, key=lambda b: b[2] * b[3], reverse=True)[0]
+    return max(faces, key=lambda b: b[2] * b[3])
+
+def detect_faces(detector, gray, scale: float = 1.0, roi: Optional[Box] = None,
+                 min_size: int = MIN_FACE, max_size: Optional[int] = None) -> List[Box]:
+    """
+    All faces in the frame (or inside roi), boxes in full-frame coordinates.
+    scale < 1 runs the cascade on a downscaled copy; min/max_size are full-resolution pixels.
+    """
+    x0 = y0 = 0
+    if roi is not None:
+        H, W = gray.shape[:2]
+        x, y, w, h = roi
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(W, x + w), min(H, y + h)
+        if x1 - x0 < min_size or y1 - y0 < min_size:
+            return []
+        gray = gray[y0:y1, x0:x1]
+    small = gray
+    if scale != 1.0:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    min_side = max(1, int(round(min_size * scale)))
+    max_side = (0, 0) if max_size is None else (int(round(max_size * scale)),) * 2
+    faces = detector.detectMultiScale(
+        small,
+        scaleFactor=1.2,
+        minNeighbors=5,
+        minSize=(min_side, min_side),
+        maxSize=max_side
+    )
+    return [(int(round(bx / scale)) + x0, int(round(by / scale)) + y0,
+             int(round(bw / scale)), int(round(bh / scale))) for bx, by, bw, bh in faces]
+
+class FaceDetector:
+    """
+    Largest-face detection for a video stream. After a hit only a region of
+    interest around the last face is searched, for faces of about its size;
+    the full frame is scanned when the ROI comes up empty and every
+    `full_every` frames, so a closer newcomer is not missed for long.
+    """
+
+    def __init__(self, detector, scale: float = DETECT_SCALE, roi_margin: float = ROI_MARGIN,
+                 full_every: int = FULL_SCAN_EVERY):
+        self.detector = detector
+        self.scale = scale
+        self.roi_margin = roi_margin
+        self.full_every = full_every
+        self.last: Optional[Box] = None
+        self.full_scans = 0
+        self._since_full = 0
+
+    def detect(self, gray) -> Optional[Box]:
+        box = None
+        if self.last is not None and self._since_full < self.full_every:
+            x, y, w, h = self.last
+            m = int(self.roi_margin * max(w, h))
+            roi = (x - m, y - m, w + 2 * m, h + 2 * m)
+            box = largest(detect_faces(self.detector, gray, self.scale, roi=roi,
+                                       min_size=max(MIN_FACE, int(0.7 * w)), max_size=int(1.4 * w) + 1))
+            self._since_full += 1
+        if box is None:
+            box = largest(detect_faces(self.detector, gray, self.scale))
+            self._since_full = 0
+            self.full_scans += 1
+        self.last = box
+        return box
 
 def crop_and_resize(gray, box: Box):
     x, y, w, h = box